@@ -1,15 +1,21 @@
 from __future__ import annotations
 
 import asyncio
-import html
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import re
 import signal
 import subprocess
 from datetime import datetime, timezone, timedelta, time as dtime
+from functools import lru_cache
 
 from telegram import Update
 from telegram.constants import ParseMode
+from telegram.error import BadRequest, NetworkError, RetryAfter
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -24,14 +30,23 @@ import tracker
 from cache import NotificationCache
 
 # ── ロギング設定 ────────────────────────────────────────────────
+# ログ呼び出しはキューへの投入だけにし、ファイル・コンソールへの書き込みは
+# QueueListener のスレッドで行う（スキャン中にイベントループがディスクI/Oで止まらないように）
+# 書式は QueueHandler 側で適用済みのため、出力側のハンドラはメッセージをそのまま書く
+_log_queue = queue.SimpleQueue()
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.FileHandler("scanner.log", encoding="utf-8"),
-        logging.StreamHandler(),
-    ],
+    handlers=[logging.handlers.QueueHandler(_log_queue)],
 )
+_log_listener = logging.handlers.QueueListener(
+    _log_queue,
+    logging.FileHandler("scanner.log", encoding="utf-8"),
+    logging.StreamHandler(),
+    respect_handler_level=True,
+)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
 JST = timezone(timedelta(hours=9))
@@ -59,135 +74,248 @@ scan_interval    = config.SCAN_INTERVAL
 scan_running     = False
 last_scan_time   = "未実行"
 
+# 前回の実行が終わる前に次のジョブが来た場合はスキップする（多重実行防止）
+_scan_lock    = asyncio.Lock()
+_outcome_lock = asyncio.Lock()
+
+
+# ── 通知送信キュー ───────────────────────────────────────────────
+# 通知はキューに積み、専用ワーカーが Telegram のレート制限
+# （同一チャット 20件/分）を守りながら順に送信する。
+_OUTBOX_MAXSIZE     = 1000
+_OUTBOX_INTERVAL    = 3.0   # 送信間隔（秒）= 60秒 ÷ 20件
+_OUTBOX_MAX_RETRIES = 5
+
+outbox: asyncio.Queue | None = None
+_outbox_task: asyncio.Task | None = None
+
+
+def enqueue_message(text: str, parse_mode: str | None = None):
+    """通知を送信キューに積む。満杯の場合は最も古い通知を捨てる。"""
+    if outbox.full():
+        outbox.get_nowait()
+        outbox.task_done()
+        logger.warning("通知キューが満杯のため、最も古い通知を破棄しました")
+    outbox.put_nowait((config.TELEGRAM_CHAT_ID, text, parse_mode))
+
+
+async def _send_with_retry(bot, chat_id: str, text: str, parse_mode: str | None):
+    """RetryAfter は指定秒数、通信エラーは指数バックオフ＋ジッターで再送する。"""
+    for attempt in range(_OUTBOX_MAX_RETRIES + 1):
+        try:
+            await bot.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode)
+            return
+        except RetryAfter as e:
+            wait = float(e.retry_after)
+        except BadRequest as e:
+            # メッセージ自体が不正 → 再送しても成功しない
+            logger.error(f"通知送信失敗（再送しません）: {e}")
+            return
+        except NetworkError as e:
+            wait = min(2 ** attempt, 60) + random.uniform(0, 1)
+            logger.warning(f"通知送信エラー: {e}")
+        if attempt < _OUTBOX_MAX_RETRIES:
+            logger.warning(f"通知送信を {wait:.1f}秒後に再試行 ({attempt + 1}/{_OUTBOX_MAX_RETRIES})")
+            await asyncio.sleep(wait)
+    logger.error("通知送信失敗: リトライ上限に達しました")
+
+
+async def outbox_worker(bot):
+    """送信キューを消費し続けるバックグラウンドタスク。"""
+    while True:
+        chat_id, text, parse_mode = await outbox.get()
+        try:
+            await _send_with_retry(bot, chat_id, text, parse_mode)
+        except Exception as e:
+            logger.error(f"通知送信エラー: {e}")
+        finally:
+            outbox.task_done()
+        await asyncio.sleep(_OUTBOX_INTERVAL)
+
 
 # ── メッセージフォーマット ────────────────────────────────────────
-def format_message(pair: dict, result: dict, pool_address: str) -> str:
-    bd         = result["breakdown"]
-    ts         = datetime.now(JST).strftime("%Y-%m-%d %H:%M:%S")
-    low_warn   = " ⚠️ サンプル少" if result["low_sample"] else ""
-    symbol     = html.escape(pair["symbol"])
-    name       = html.escape(pair["name"])
-    ca         = html.escape(pair["token_address"])
-
-    # 現在価格からサプライを逆算し、各指標をMC換算する
-    entry   = result["entry"]
-    mc      = pair["mc"]
-    supply  = mc / entry if entry > 0 else 0
-    sl_mc   = result["stop_loss"]   * supply
-    tp_mc   = result["take_profit"] * supply
-    vwap_mc = result["vwap"]        * supply
-    atr_pct = result["atr"] / entry * 100 if entry > 0 else 0
-    atr_mc  = result["atr"] * supply
-
-    pps_bonus_str = f"{bd['pps_bonus']:+.0f}" if bd.get("pps_bonus", 0) != 0 else "±0"
+# HTML エスケープ用の変換表（html.escape(quote=True) と同じ5文字を置換）
+_HTML_ESCAPE_TABLE = str.maketrans({
+    "&":  "&amp;",
+    "<":  "&lt;",
+    ">":  "&gt;",
+    "\"": "&quot;",
+    "'":  "&#x27;",
+})
+
+
+def _escape_html(s: str) -> str:
+    return s.translate(_HTML_ESCAPE_TABLE)
+
+
+# 通知本文のテンプレート（書式指定はモジュール読み込み時に1度だけ組み立てる）
+_MSG_TEMPLATE = (
+    "🚨 ミームコインアラート 🚨\n"
+    "\n"
+    "🪙 {symbol} ({name})\n"
+    "🔗 Solana  |  📦 MC帯: {mc_band}\n"
+    "📊 スコア: {score}/100\n"
+    "\n"
+    "━━━━━━━━━━━━━━━\n"
+    "📈 スコア内訳\n"
+    "  出来高急増:  {vol_score:.0f}/30  "
+    "(×{vol_surge:.1f} / 閾値×{surge_min:.0f})\n"
+    "  VWAP上抜け: {vwap_score:.0f}/20\n"
+    "  RSI(9):     {rsi_score:.0f}/15  "
+    "(RSI: {rsi:.1f} / 過熱閾値: {rsi_ob})\n"
+    "  再現性:     {repro_score:.0f}/25  "
+    "({success_count}/{signal_count}回成功 / "
+    "{success_rate:.0%}){low_warn}\n"
+    "  過熱ペナル: {penalty:.0f}/−15\n"
+    "  価格位置:   {pps_bonus_str}/±10\n"
+    "\n"
+    "━━━━━━━━━━━━━━━\n"
+    "📍 価格位置: {pps_stars} {pps_label} ({pps}/5)\n"
+    "  レンジ内: 下位{range_pct:.0%}  "
+    "VWAP乖離: {vwap_dev:+.1f}%\n"
+    "\n"
+    "━━━━━━━━━━━━━━━\n"
+    "💰 現在MC:    ${mc:,.0f}\n"
+    "📉 損切りMC:  ${sl_mc:,.0f}  (ATR×{atr_sl_mult})\n"
+    "📈 利確目標MC:${tp_mc:,.0f}  (ATR×{atr_tp_mult})\n"
+    "⚖️  RR比:     1:{risk_reward:.1f}\n"
+    "📐 ATR:       {atr_pct:.2f}%  (${atr_mc:,.0f})\n"
+    "📊 VWAP MC:   ${vwap_mc:,.0f}\n"
+    "\n"
+    "━━━━━━━━━━━━━━━\n"
+    "💧 流動性:   ${liquidity:,.0f}\n"
+    "🕐 1h出来高: ${volume_h1:,.0f}\n"
+    "\n"
+    "📋 CA（タップでコピー）\n"
+    "<code>{ca}</code>\n"
+    "⏰ {ts} JST"
+).format_map
 
 
-    msg = (
-        f"🚨 ミームコインアラート 🚨\n"
-        f"\n"
-        f"🪙 {symbol} ({name})\n"
-        f"🔗 Solana  |  📦 MC帯: {result['mc_band']}\n"
-        f"📊 スコア: {result['score']}/100\n"
-        f"\n"
-        f"━━━━━━━━━━━━━━━\n"
-        f"📈 スコア内訳\n"
-        f"  出来高急増:  {bd['vol_score']:.0f}/30  "
-        f"(×{result['vol_surge']:.1f} / 閾値×{result['surge_min']:.0f})\n"
-        f"  VWAP上抜け: {bd['vwap_score']:.0f}/20\n"
-        f"  RSI(9):     {bd['rsi_score']:.0f}/15  "
-        f"(RSI: {result['rsi']:.1f} / 過熱閾値: {result['rsi_ob']})\n"
-        f"  再現性:     {bd['repro_score']:.0f}/25  "
-        f"({result['success_count']}/{result['signal_count']}回成功 / "
-        f"{result['success_rate']:.0%}){low_warn}\n"
-        f"  過熱ペナル: {bd['penalty']:.0f}/−15\n"
-        f"  価格位置:   {pps_bonus_str}/±10\n"
-        f"\n"
-        f"━━━━━━━━━━━━━━━\n"
-        f"📍 価格位置: {result['pps_stars']} {result['pps_label']} ({result['pps']}/5)\n"
-        f"  レンジ内: 下位{result['range_pct']:.0%}  "
-        f"VWAP乖離: {result['vwap_dev']:+.1f}%\n"
-        f"\n"
-        f"━━━━━━━━━━━━━━━\n"
-        f"💰 現在MC:    ${mc:,.0f}\n"
-        f"📉 損切りMC:  ${sl_mc:,.0f}  (ATR×{result['atr_sl_mult']})\n"
-        f"📈 利確目標MC:${tp_mc:,.0f}  (ATR×{result['atr_tp_mult']})\n"
-        f"⚖️  RR比:     1:{result['risk_reward']:.1f}\n"
-        f"📐 ATR:       {atr_pct:.2f}%  (${atr_mc:,.0f})\n"
-        f"📊 VWAP MC:   ${vwap_mc:,.0f}\n"
-        f"\n"
-        f"━━━━━━━━━━━━━━━\n"
-        f"💧 流動性:   ${pair['liquidity']:,.0f}\n"
-        f"🕐 1h出来高: ${pair['volume_h1']:,.0f}\n"
-        f"\n"
-        f"📋 CA（タップでコピー）\n"
-        f"<code>{ca}</code>\n"
-        f"⏰ {ts} JST"
-    )
-    return msg
+def format_message(pair: dict, result: dict, pool_address: str) -> str:
+    bd = result["breakdown"]
+    ca = pair["token_address"]
+
+    return _MSG_TEMPLATE({
+        **result,
+        **bd,
+        "symbol":        _escape_html(pair["symbol"]),
+        "name":          _escape_html(pair["name"]),
+        # トークンアドレスは通常 base58（英数字のみ）なのでエスケープ不要
+        "ca":            ca if ca.isalnum() else _escape_html(ca),
+        "mc":            pair["mc"],
+        "liquidity":     pair["liquidity"],
+        "volume_h1":     pair["volume_h1"],
+        "low_warn":      " ⚠️ サンプル少" if result["low_sample"] else "",
+        "pps_bonus_str": f"{bd['pps_bonus']:+.0f}" if bd.get("pps_bonus", 0) != 0 else "±0",
+        "ts":            datetime.now(JST).strftime("%Y-%m-%d %H:%M:%S"),
+    })
 
 
 # ── スキャン本体 ─────────────────────────────────────────────────
+async def _fetch_and_score(pair: dict, threshold: int) -> dict | None:
+    """1ペア分の OHLCV 取得とスコア計算を行う。スキップした場合は None を返す。"""
+    df = await gt_fetcher.fetch_ohlcv_async(pair["pair_address"], pair["mc"])
+
+    if df is None or len(df) < config.MIN_CANDLES:
+        logger.warning(
+            f"{pair['symbol']}: OHLCVデータ不足"
+            f"（{len(df) if df is not None else 0}本）、スキップ"
+        )
+        return None
+
+    # スコア計算
+    try:
+        result = await asyncio.to_thread(scorer.calculate_score, df, pair, threshold)
+    except Exception as e:
+        logger.error(f"{pair['symbol']}: スコア計算エラー: {e}")
+        return None
+
+    logger.info(f"{pair['symbol']}: {result['score']}点")
+    return result
+
+
 async def run_scan(context: ContextTypes.DEFAULT_TYPE):
-    global last_scan_time, scan_running
+    if _scan_lock.locked():
+        logger.info("前回のスキャンが実行中のためスキップ")
+        return
+    async with _scan_lock:
+        await _scan(context)
+
+
+async def _scan(context: ContextTypes.DEFAULT_TYPE):
+    global last_scan_time
 
     logger.info("スキャン開始")
 
+    # スキャン途中で /threshold が変わっても、スコア計算と通知判定で同じ閾値を使う
+    threshold = notify_threshold
+
     # Stage 1: GeckoTerminal trending_pools でMCフィルタ
-    pairs = dex_scanner.get_filtered_pairs()
+    # レート制限の待機でイベントループを止めないよう、ワーカースレッドで取得する
+    pairs = await asyncio.to_thread(dex_scanner.get_filtered_pairs)
     logger.info(f"Stage1完了: MCレンジ内からランダム{len(pairs)}件をスキャン")
 
+    # 重複・OPEN中の判定用集合はスキャンごとに1回だけ作る
+    recent      = cache.recent_keys()
+    open_tokens = tracker.open_tokens_set()
+
+    candidates = []
+    seen       = set()   # 同じトークンが複数プール（X/SOL, X/USDC など）で並んでも1件だけスコア計算する
     for pair in pairs:
         token_address = pair["token_address"]
 
+        if token_address in seen:
+            logger.info(f"{pair['symbol']}: 同一トークンの別プールのためスキップ")
+            continue
+        seen.add(token_address)
+
         # 重複チェック
-        if cache.is_recent(token_address):
+        if token_address in recent:
             logger.info(f"{pair['symbol']}: キャッシュ済みのためスキップ")
             continue
 
         # OPEN中チェック（OHLCV取得前にスキップして無駄なAPI呼び出しを防ぐ）
-        if tracker.is_token_open(token_address):
+        if token_address in open_tokens:
             logger.info(f"{pair['symbol']}: OPEN中のためスキップ")
             continue
 
-        # Stage 2: OHLCV取得
         # pair_address は trending_pools から取得済みのプールアドレスをそのまま使用
-        pool_address = pair["pair_address"]
-        if not pool_address:
+        if not pair["pair_address"]:
             logger.warning(f"{pair['symbol']}: プールアドレスなし、スキップ")
             continue
 
-        await asyncio.sleep(config.GT_REQUEST_INTERVAL)
-        df = gt_fetcher.fetch_ohlcv(pool_address, pair["mc"])
-        if df is None or len(df) < config.MIN_CANDLES:
-            logger.warning(
-                f"{pair['symbol']}: OHLCVデータ不足"
-                f"（{len(df) if df is not None else 0}本）、スキップ"
-            )
-            continue
+        candidates.append(pair)
 
-        # スコア計算
-        try:
-            result = scorer.calculate_score(df, pair)
-        except Exception as e:
-            logger.error(f"{pair['symbol']}: スコア計算エラー: {e}")
+    # Stage 2: OHLCV取得 + スコア計算（並列）
+    results = await asyncio.gather(*(_fetch_and_score(p, threshold) for p in candidates))
+
+    # 通知とログ記録は元の順序で逐次行う
+    for pair, result in zip(candidates, results):
+        if result is None:
             continue
 
-        logger.info(f"{pair['symbol']}: {result['score']}点")
+        token_address = pair["token_address"]
+        pool_address  = pair["pair_address"]
+
+        # このスキャン中に記録済み（OPEN）になったトークンは通知も記録もしない
+        if token_address in open_tokens:
+            logger.info(f"{pair['symbol']}: OPEN中のためスキップ")
+            continue
 
         # 閾値超えたら通知
-        notified = result["score"] >= notify_threshold
+        notified = result["score"] >= threshold
         if notified:
-            msg = format_message(pair, result, pool_address)
-            await context.bot.send_message(
-                chat_id=config.TELEGRAM_CHAT_ID,
-                text=msg,
-                parse_mode=ParseMode.HTML,
-            )
+            enqueue_message(format_message(pair, result, pool_address), ParseMode.HTML)
             cache.mark(token_address)
-            logger.info(f"{pair['symbol']}: 通知送信（{result['score']}点）")
+            logger.info(f"{pair['symbol']}: 通知キュー追加（{result['score']}点）")
 
         # スコア計算済みのすべてのペアをログに記録（閾値未満も含む）
-        tracker.record_signal(pair, result, pool_address, notified, notify_threshold)
+        if tracker.record_signal(pair, result, pool_address, notified, threshold):
+            open_tokens.add(token_address)
+
+    # 再起動時に signal_log.csv を全件読まずに済むよう、通知キャッシュを保存しておく
+    cache.save_snapshot()
 
     last_scan_time = datetime.now(JST).strftime("%Y-%m-%d %H:%M:%S")
     logger.info("スキャン完了")
@@ -195,19 +323,42 @@ async def run_scan(context: ContextTypes.DEFAULT_TYPE):
 
 async def check_outcomes_job(context: ContextTypes.DEFAULT_TYPE):
     """シグナルから60分後の値動きを確認してログを更新するバックグラウンドジョブ。"""
-    updated = await asyncio.to_thread(tracker.check_outcomes)
+    # 確認時刻に達した OPEN シグナルが無ければ CSV を読まずに終える（判定はメモリ上の最古の時刻だけで行う）
+    if not tracker.has_old_open_signals():
+        return
+    if _outcome_lock.locked():
+        logger.info("[tracker] 前回の結果確認が実行中のためスキップ")
+        return
+    async with _outcome_lock:
+        updated = await asyncio.to_thread(tracker.check_outcomes)
     if updated > 0:
         logger.info(f"[tracker] バックグラウンド結果確認: {updated}件更新")
 
 
 # ── ヘルプテキスト（常に最新の設定値を返す関数） ──────────────────
+# 設定変更コマンドのたびに _settings_version を進め、表示用テキストのキャッシュを無効化する
+_settings_version = 0
+_help_cache:   dict = {"v": None, "s": ""}
+_status_cache: dict = {"v": None, "s": ""}
+
+
+def _bump_settings_version():
+    global _settings_version
+    _settings_version += 1
+
+
+@lru_cache(maxsize=64)
+def _fmt_interval(seconds: int) -> str:
+    """スキャン間隔の表示文字列（60の倍数なら「N分」、それ以外は「N秒」）。"""
+    return f"{seconds // 60}分" if seconds % 60 == 0 else f"{seconds}秒"
+
+
 def get_help_text() -> str:
-    interval_disp = (
-        f"{scan_interval // 60}分"
-        if scan_interval % 60 == 0
-        else f"{scan_interval}秒"
-    )
-    return (
+    if _help_cache["v"] == _settings_version:
+        return _help_cache["s"]
+
+    interval_disp = _fmt_interval(scan_interval)
+    text = (
         "🤖 Meme Scanner Bot\n"
         "Solana ミームコインをスキャンして高スコアのシグナルを通知します。\n"
         "\n"
@@ -245,6 +396,9 @@ def get_help_text() -> str:
         f"  通知閾値:     {notify_threshold}点以上\n"
         f"  スキャン間隔: {interval_disp}"
     )
+    _help_cache["v"] = _settings_version
+    _help_cache["s"] = text
+    return text
 
 
 # ── コマンドハンドラ ─────────────────────────────────────────────
@@ -257,9 +411,10 @@ async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     scan_running = True
 
     # 起動時に1時間以上経過した OPEN シグナルがあれば即座に結果確認
-    if tracker.has_old_open_signals():
+    if tracker.has_old_open_signals() and not _outcome_lock.locked():
         await update.message.reply_text("⏳ 未確認の古いシグナルがあります。結果を確認中...")
-        updated = await asyncio.to_thread(tracker.check_outcomes)
+        async with _outcome_lock:
+            updated = await asyncio.to_thread(tracker.check_outcomes)
         if updated > 0:
             await update.message.reply_text(f"✅ {updated}件のシグナル結果を更新しました。")
 
@@ -279,11 +434,7 @@ async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         name="outcome_check",
         job_kwargs={"misfire_grace_time": 120},
     )
-    interval_disp = (
-        f"{scan_interval // 60}分"
-        if scan_interval % 60 == 0
-        else f"{scan_interval}秒"
-    )
+    interval_disp = _fmt_interval(scan_interval)
     await update.message.reply_text(
         f"🚀 スキャンBot起動\n"
         f"⏱️ スキャン間隔: {interval_disp}\n"
@@ -296,6 +447,9 @@ async def cmd_help(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def cmd_scan(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if _scan_lock.locked():
+        await update.message.reply_text("⏳ スキャン実行中です。完了までお待ちください。")
+        return
     await update.message.reply_text("🔍 即時スキャンを実行します...")
     await run_scan(context)
     await update.message.reply_text("✅ スキャン完了")
@@ -311,15 +465,19 @@ async def cmd_stop(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def cmd_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # 設定値の部分は設定変更時のみ作り直す（稼働状況は毎回最新を表示）
+    if _status_cache["v"] != _settings_version:
+        _status_cache["v"] = _settings_version
+        _status_cache["s"] = (
+            f"⚙️ 現在の設定\n"
+            f"\n"
+            f"📦 MCレンジ:     ${config.MC_MIN:,.0f} 〜 ${config.MC_MAX:,.0f}\n"
+            f"🎲 スキャン対象: MCレンジ内からランダム10件\n"
+            f"🎯 通知閾値:     {notify_threshold}点以上\n"
+            f"⏱️ スキャン間隔: {_fmt_interval(scan_interval)} ({scan_interval}秒)\n"
+        )
     status_text = (
-        f"⚙️ 現在の設定\n"
-        f"\n"
-        f"📦 MCレンジ:     ${config.MC_MIN:,.0f} 〜 ${config.MC_MAX:,.0f}\n"
-        f"🎲 スキャン対象: MCレンジ内からランダム10件\n"
-        f"🎯 通知閾値:     {notify_threshold}点以上\n"
-        f"⏱️ スキャン間隔: "
-        f"{'%d分' % (scan_interval // 60) if scan_interval % 60 == 0 else '%d秒' % scan_interval}"
-        f" ({scan_interval}秒)\n"
+        _status_cache["s"] +
         f"🔄 自動スキャン: {'稼働中 ✅' if scan_running else '停止中 ⛔'}\n"
         f"⏰ 最終スキャン: {last_scan_time} JST"
     )
@@ -339,6 +497,7 @@ async def cmd_threshold(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     notify_threshold = val
+    _bump_settings_version()
     await update.message.reply_text(f"✅ 通知閾値を {notify_threshold}点 に変更しました。")
 
 
@@ -408,7 +567,8 @@ async def cmd_setinterval(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     scan_interval = seconds
-    interval_disp = f"{seconds // 60}分" if seconds % 60 == 0 else f"{seconds}秒"
+    _bump_settings_version()
+    interval_disp = _fmt_interval(seconds)
 
     # 自動スキャンが稼働中なら即座にジョブを再登録
     if scan_running:
@@ -431,6 +591,19 @@ async def cmd_setinterval(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
 
+# /setmc の値: 数値 + 任意の単位（K=千, M=百万）。負の値は後段で弾くため符号も受け付ける
+_MC_RE   = re.compile(r"^\s*([+-]?(?:\d+\.?\d*|\.\d+)(?:e[+-]?\d+)?)\s*([KM])?\s*$", re.IGNORECASE)
+_MC_MULT = {None: 1, "K": 1_000, "M": 1_000_000}
+
+
+def _parse_mc(s: str) -> float | None:
+    m = _MC_RE.match(s)
+    if m is None:
+        return None
+    unit = m.group(2)
+    return float(m.group(1)) * _MC_MULT[unit.upper() if unit else None]
+
+
 async def cmd_setmc(update: Update, context: ContextTypes.DEFAULT_TYPE):
     args = context.args
     if len(args) != 2:
@@ -441,20 +614,8 @@ async def cmd_setmc(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
 
-    def parse_value(s: str) -> float | None:
-        s = s.upper().strip()
-        try:
-            if s.endswith("M"):
-                return float(s[:-1]) * 1_000_000
-            elif s.endswith("K"):
-                return float(s[:-1]) * 1_000
-            else:
-                return float(s)
-        except ValueError:
-            return None
-
-    mc_min = parse_value(args[0])
-    mc_max = parse_value(args[1])
+    mc_min = _parse_mc(args[0])
+    mc_max = _parse_mc(args[1])
 
     if mc_min is None or mc_max is None:
         await update.message.reply_text("❌ 数値の形式が不正です。例: /setmc 500K 50M")
@@ -470,6 +631,7 @@ async def cmd_setmc(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     config.MC_MIN = mc_min
     config.MC_MAX = mc_max
+    _bump_settings_version()
 
     await update.message.reply_text(
         f"✅ MCレンジを更新しました\n"
@@ -484,7 +646,9 @@ async def daily_log_commit_job(context: ContextTypes.DEFAULT_TYPE):
     """毎日 0:00 JST に signal_log.csv を GitHub の logs ブランチへコミットする"""
     script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "commit_logs.sh")
     try:
-        result = subprocess.run(
+        # git push で最大60秒かかるため、イベントループを止めないよう別スレッドで実行する
+        result = await asyncio.to_thread(
+            subprocess.run,
             ["bash", script],
             capture_output=True,
             text=True,
@@ -493,30 +657,35 @@ async def daily_log_commit_job(context: ContextTypes.DEFAULT_TYPE):
         if result.returncode == 0:
             msg = result.stdout.strip()
             logger.info(f"[log_commit] {msg}")
-            await context.bot.send_message(
-                chat_id=config.TELEGRAM_CHAT_ID,
-                text=f"📊 logs/signal_log.csv を GitHub (logs ブランチ) にコミットしました\n{msg}",
-            )
+            enqueue_message(f"📊 logs/signal_log.csv を GitHub (logs ブランチ) にコミットしました\n{msg}")
         else:
             err = result.stderr.strip()
             logger.error(f"[log_commit] コミット失敗: {err}")
-            await context.bot.send_message(
-                chat_id=config.TELEGRAM_CHAT_ID,
-                text=f"⚠️ logs/signal_log.csv のコミットに失敗しました\n{err}",
-            )
+            enqueue_message(f"⚠️ logs/signal_log.csv のコミットに失敗しました\n{err}")
     except Exception as e:
         logger.error(f"[log_commit] コミットエラー: {e}")
 
 
 # ── 起動時フック ─────────────────────────────────────────────────
 async def on_startup(app: Application) -> None:
-    """Bot 起動直後に Telegram へヘルプメッセージを送信する"""
+    """Bot 起動直後に送信キューのワーカーを起動し、Telegram へヘルプメッセージを送信する"""
+    global outbox, _outbox_task
+    outbox       = asyncio.Queue(maxsize=_OUTBOX_MAXSIZE)
+    _outbox_task = asyncio.create_task(outbox_worker(app.bot))
+
     ts = datetime.now(JST).strftime("%Y-%m-%d %H:%M:%S")
     greeting = f"✅ Bot が起動しました（{ts} JST）\n\n" + get_help_text()
     await app.bot.send_message(chat_id=config.TELEGRAM_CHAT_ID, text=greeting)
     logger.info("起動通知を送信しました")
 
 
+async def on_shutdown(app: Application) -> None:
+    """送信キューのワーカーを停止し、通知キャッシュを保存する"""
+    if _outbox_task is not None:
+        _outbox_task.cancel()
+    cache.save_snapshot()
+
+
 # ── エントリーポイント ────────────────────────────────────────────
 def main():
     if not config.TELEGRAM_TOKEN:
@@ -530,6 +699,7 @@ def main():
             Application.builder()
             .token(config.TELEGRAM_TOKEN)
             .post_init(on_startup)
+            .post_shutdown(on_shutdown)
             .build()
         )
 
@@ -1,48 +1,174 @@
+from __future__ import annotations
+
+import heapq
+import json
 import logging
 import os
 import time
+from collections import OrderedDict
 
 import pandas as pd
 
 from config import NOTIFY_TTL
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # pyarrow が無い環境では pandas の CSV リーダーを使う
+    pa = pacsv = None
+
+__all__ = ["NotificationCache"]
+
 logger = logging.getLogger(__name__)
 
 _LOG_DIR  = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
 _LOG_FILE = os.path.join(_LOG_DIR, "signal_log.csv")
+# 起動時の復元用スナップショット（通知済みトークン → 通知時刻[Unix秒]）
+_SNAPSHOT_FILE = os.path.join(_LOG_DIR, "cache_snapshot.json")
+
+# キャッシュ復元に必要な列だけを読む
+_RESTORE_COLUMNS = ["token_address", "signal_time_unix", "notified"]
+
+# 保持するトークン数の上限（超えた分は古いものから捨てる）
+_MAX_ENTRIES = 10_000
+# is_recent 1回あたりに掃除する期限切れエントリの上限（1回の処理時間を一定に抑える）
+_SWEEP_LIMIT = 32
+
+
+def _read_log() -> pd.DataFrame:
+    """signal_log.csv から復元用の3列を読み込む。pyarrow があればそちらで高速に読む。"""
+    if pacsv is not None:
+        table = pacsv.read_csv(
+            _LOG_FILE,
+            convert_options=pacsv.ConvertOptions(
+                include_columns=_RESTORE_COLUMNS,
+                column_types={
+                    "token_address":    pa.string(),
+                    "signal_time_unix": pa.float64(),
+                    "notified":         pa.string(),
+                },
+            ),
+        )
+        return table.to_pandas()
+    return pd.read_csv(_LOG_FILE, encoding="utf-8-sig", usecols=_RESTORE_COLUMNS)
 
 
 class NotificationCache:
-    def __init__(self, ttl: int = NOTIFY_TTL):
-        self._store: dict[str, float] = {}
+    def __init__(self, ttl: int = NOTIFY_TTL, max_entries: int = _MAX_ENTRIES):
+        # 時刻は time.monotonic() の整数秒で持つ（壁時計の変更で期限が狂わないようにする）
+        self._store: OrderedDict[str, int] = OrderedDict()
+        self._expiry_heap: list[tuple[int, str]] = []
         self.ttl = ttl
-        self._restore_from_log()
+        self.max_entries = max_entries
+        # ログの Unix 秒を monotonic 秒に換算するための差分（起動時に1回だけ求める）
+        self._mono_offset = time.monotonic() - time.time()
+        # mark() 以降スナップショットに未反映の変更があるか
+        self._dirty = False
+        # スナップショットがあればそれだけを読み、無い・壊れている場合のみ signal_log.csv から復元する
+        if not self._restore_from_snapshot():
+            self._restore_from_log()
+
+    @staticmethod
+    def _now() -> int:
+        return int(time.monotonic())
+
+    def _put(self, key: str, ts: int):
+        self._store[key] = ts
+        self._store.move_to_end(key)
+        heapq.heappush(self._expiry_heap, (ts + self.ttl, key))
+        if len(self._store) > self.max_entries:
+            self._store.popitem(last=False)
+
+    def _sweep(self, now: int):
+        """期限切れのエントリを古い順に最大 _SWEEP_LIMIT 件削除する。"""
+        heap = self._expiry_heap
+        for _ in range(_SWEEP_LIMIT):
+            if not heap or heap[0][0] > now:
+                break
+            expiry, key = heapq.heappop(heap)
+            ts = self._store.get(key)
+            # 再マーク済みのキーは新しい期限が別にあるため残す
+            if ts is not None and ts + self.ttl <= expiry:
+                del self._store[key]
+
+    def _restore_from_snapshot(self) -> bool:
+        """cache_snapshot.json から TTL 内のエントリを復元する。読み込めた場合は True。"""
+        try:
+            with open(_SNAPSHOT_FILE, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"[cache] スナップショット読み込み失敗（ログから復元します）: {e}")
+            return False
+
+        now = time.time()
+        restored = 0
+        # 古い順に登録する（LRU順を時系列に揃える）
+        for token, notify_time in sorted(snapshot.items(), key=lambda kv: kv[1]):
+            if now - notify_time < self.ttl:
+                self._put(token, int(notify_time + self._mono_offset))
+                restored += 1
+        if restored > 0:
+            logger.info(f"[cache] 起動時に {restored}件の通知キャッシュをスナップショットから復元しました")
+        return True
+
+    def save_snapshot(self):
+        """前回保存以降に mark() があればスナップショットを書き出す（一時ファイル経由で置き換える）。"""
+        if not self._dirty:
+            return
+        now = self._now()
+        snapshot = {
+            k: ts - self._mono_offset
+            for k, ts in self._store.items()
+            if now - ts < self.ttl
+        }
+        tmp = _SNAPSHOT_FILE + ".tmp"
+        try:
+            os.makedirs(_LOG_DIR, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp, _SNAPSHOT_FILE)
+            self._dirty = False
+        except Exception as e:
+            logger.warning(f"[cache] スナップショット保存失敗: {e}")
 
     def _restore_from_log(self):
         """Bot再起動時に signal_log.csv からTTL内の通知済みトークンを復元する。"""
         if not os.path.exists(_LOG_FILE):
             return
         try:
-            df = pd.read_csv(_LOG_FILE, encoding="utf-8-sig", usecols=["token_address", "signal_time_unix", "notified"])
+            df = _read_log()
             now = time.time()
-            recent = df[
-                (df["notified"].astype(str).str.lower() == "true") &
-                (now - df["signal_time_unix"].astype(float) < self.ttl)
-            ]
-            for _, row in recent.iterrows():
-                token = str(row["token_address"])
-                notify_time = float(row["signal_time_unix"])
-                # すでに復元済みの場合は最新の通知時刻で上書き
-                if token not in self._store or self._store[token] < notify_time:
-                    self._store[token] = notify_time
+            ts  = df["signal_time_unix"].to_numpy(dtype="float64")
+            mask = (df["notified"].astype(str).str.lower() == "true").to_numpy() & (now - ts < self.ttl)
+            recent = df.loc[mask, ["token_address", "signal_time_unix"]]
+            # トークンごとに最新の通知時刻だけを残し、古い順に登録する（LRU順を時系列に揃える）
+            latest = (
+                recent.groupby("token_address", sort=False)["signal_time_unix"]
+                .max()
+                .astype(float)
+                .sort_values()
+            )
+            for token, notify_time in latest.items():
+                self._put(str(token), int(notify_time + self._mono_offset))
             if len(recent) > 0:
                 logger.info(f"[cache] 起動時に {len(recent)}件の通知キャッシュを復元しました")
         except Exception as e:
             logger.warning(f"[cache] キャッシュ復元失敗（無視して続行）: {e}")
 
     def is_recent(self, key: str) -> bool:
+        now = self._now()
+        self._sweep(now)
         ts = self._store.get(key)
-        return ts is not None and (time.time() - ts) < self.ttl
+        return ts is not None and (now - ts) < self.ttl
+
+    def recent_keys(self) -> set[str]:
+        """TTL 内に通知済みのキーの集合を返す（スキャンごとに1回だけ計算して一括判定に使う）。"""
+        now = self._now()
+        self._sweep(now)
+        return {k for k, ts in self._store.items() if now - ts < self.ttl}
 
     def mark(self, key: str):
-        self._store[key] = time.time()
+        self._put(key, self._now())
+        self._dirty = True
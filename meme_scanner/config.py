@@ -1,4 +1,7 @@
+import bisect
 import os
+from typing import NamedTuple
+
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -64,6 +67,16 @@ SCAN_INTERVAL = 300    # 秒（デフォルト: 5分）
 # ================================================================
 NOTIFY_THRESHOLD = 70
 
+# ================================================================
+#  通知に届かないコインの再現性計算を省略するか
+#
+#  True : 出来高・VWAP・RSI・価格位置のスコアに再現性の満点（25点）を
+#         足しても通知閾値に届かないコインは、再現性の計算を省略する。
+#         スキャンは速くなるが、そのコインのログの再現性スコアは 0 になる。
+#  False: すべてのコインで再現性を計算する（閾値未満のログも正確な点数になる）
+# ================================================================
+SKIP_REPRO_BELOW_THRESHOLD = True
+
 # ================================================================
 #  RSI の計算期間
 #
@@ -157,15 +170,43 @@ MC_BAND_PARAMS = [
     },
 ]
 
-def get_mc_params(mc: float) -> dict:
+
+class MCParams(NamedTuple):
+    """MC帯1つ分のパラメータ。項目は MC_BAND_PARAMS の各辞書のキーと同じ。"""
+    mc_min:           float
+    mc_max:           float
+    rsi_overbought:   float
+    atr_sl_mult:      float
+    atr_tp_mult:      float
+    volume_surge_min: float
+    ohlcv_aggregate:  int
+
+
+# スコア計算時の参照用に、MC_BAND_PARAMS を属性アクセスできる不変のタプルへ変換しておく
+MC_BANDS = tuple(MCParams(**band) for band in MC_BAND_PARAMS)
+
+# 帯判定用に各帯の上限（mc_max）を昇順で並べたもの（MC_BAND_PARAMS は mc_max の昇順で定義する）
+_MC_BAND_MAXES = [band["mc_max"] for band in MC_BAND_PARAMS]
+
+
+def get_mc_band_index(mc: float) -> int:
+    """
+    MCの値から該当するMC帯の MC_BAND_PARAMS 上のインデックスを返す。
+    どの帯にも該当しない場合はミッドキャップ（最後の帯）のインデックスを返す。
+    """
+    # mc < mc_max となる最初の帯を二分探索し、その帯の下限も満たすか確認する
+    i = bisect.bisect_right(_MC_BAND_MAXES, mc)
+    if i < len(MC_BANDS) and MC_BANDS[i].mc_min <= mc:
+        return i
+    return len(MC_BANDS) - 1
+
+
+def get_mc_params(mc: float) -> MCParams:
     """
     MCの値から該当するMC帯パラメータを返す。
     どの帯にも該当しない場合はミッドキャップのパラメータで代用。
     """
-    for band in MC_BAND_PARAMS:
-        if band["mc_min"] <= mc < band["mc_max"]:
-            return band
-    return MC_BAND_PARAMS[-1]
+    return MC_BANDS[get_mc_band_index(mc)]
 
 # ================================================================
 #  GeckoTerminal OHLCV 取得設定
@@ -185,6 +226,9 @@ OHLCV_LIMIT     = 100
 #  DEX_REQUEST_INTERVAL : DexScreener へのリクエスト間隔（秒）
 #  GT_REQUEST_INTERVAL  : GeckoTerminal へのリクエスト間隔（秒）
 #                         無料プランは 30req/分 → 2秒間隔が安全
+#  GT_MAX_CONCURRENCY   : OHLCV 取得の同時実行数
+#                         リクエストの開始間隔は GT_REQUEST_INTERVAL で制御されるため、
+#                         増やしても API への負荷は変わらず、応答待ちが重なるだけ。
 # ================================================================
 DEX_BASE_URL = "https://api.dexscreener.com"
 DEX_REQUEST_INTERVAL = 1.0   # 秒
@@ -192,6 +236,7 @@ DEX_REQUEST_INTERVAL = 1.0   # 秒
 GT_BASE_URL = "https://api.geckoterminal.com/api/v2"
 GT_HEADERS  = {"Accept": "application/json;version=20230302"}
 GT_REQUEST_INTERVAL = 2.0    # 秒（無料プラン上限: 30req/分）
+GT_MAX_CONCURRENCY  = 5
 
 # ================================================================
 #  トレンドプールの集計期間
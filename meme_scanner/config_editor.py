@@ -14,15 +14,23 @@ Meme Scanner 設定エディタ（インタラクティブ CLI）
 """
 from __future__ import annotations
 
+import ast
+import copy
 import os
-import re
+import select
 import shlex
+import shutil
 import signal
 import subprocess
 import sys
 import time
 from datetime import datetime, timezone, timedelta
 
+try:
+    import psutil
+except ImportError:  # psutil が無い環境では pidfd / ポーリングで終了を待つ
+    psutil = None
+
 # ── パス定義 ──────────────────────────────────────────────────────
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG_FILE = os.path.join(SCRIPT_DIR, "config.py")
@@ -36,12 +44,33 @@ JST = timezone(timedelta(hours=9))
 #  現在の設定値を config.py から読み込む
 # ══════════════════════════════════════════════════════════════
 
+# エディタが参照する設定名（config.py 内でリテラルとして定義されているもの）
+_CONFIG_KEYS = {"MC_BAND_PARAMS", "MC_MIN", "MC_MAX", "LIQ_MIN", "NOTIFY_THRESHOLD"}
+
+# (config.py の mtime_ns, 読み込み結果) — ファイルが変わらない限り再解析しない
+_CFG_CACHE: tuple[int, dict] | None = None
+
+
 def _load_config() -> dict:
-    """config.py を exec して現在値を返す。"""
-    ns: dict = {}
-    with open(CONFIG_FILE, encoding="utf-8") as f:
-        exec(f.read(), ns)  # noqa: S102
-    return ns
+    """
+    config.py を AST 解析して現在値を返す（exec はしない）。
+    _CONFIG_KEYS の代入文だけを ast.literal_eval で評価し、結果は mtime でキャッシュする。
+    呼び出し側が値を書き換えてもキャッシュに影響しないよう、コピーを返す。
+    """
+    global _CFG_CACHE
+    mtime_ns = os.stat(CONFIG_FILE).st_mtime_ns
+    if _CFG_CACHE is None or _CFG_CACHE[0] != mtime_ns:
+        with open(CONFIG_FILE, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=CONFIG_FILE)
+        ns: dict = {}
+        for node in tree.body:
+            if not isinstance(node, ast.Assign):
+                continue
+            for target in node.targets:
+                if isinstance(target, ast.Name) and target.id in _CONFIG_KEYS:
+                    ns[target.id] = ast.literal_eval(node.value)
+        _CFG_CACHE = (mtime_ns, ns)
+    return copy.deepcopy(_CFG_CACHE[1])
 
 
 # ══════════════════════════════════════════════════════════════
@@ -181,18 +210,28 @@ def _apply_changes(changes: dict, cfg: dict):
         # ブロックを再生成（コメント行・元の書式は破棄、基本構造を維持）
         new_block = _render_band_params(bands)
 
-        # 既存の MC_BAND_PARAMS = [ ... ] ブロックを置換
-        src = re.sub(
-            r"MC_BAND_PARAMS\s*=\s*\[.*?\]",
-            new_block,
-            src,
-            flags=re.DOTALL,
-        )
+        # 既存の MC_BAND_PARAMS = [ ... ] ブロックを AST で特定し、行単位で差し替える
+        src = _replace_assignment(src, "MC_BAND_PARAMS", new_block)
 
     with open(CONFIG_FILE, "w", encoding="utf-8") as f:
         f.write(src)
 
 
+def _replace_assignment(src: str, name: str, new_block: str) -> str:
+    """トップレベルの `name = ...` 代入文が占める行を new_block で置き換えたソースを返す。"""
+    for node in ast.parse(src).body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(t, ast.Name) and t.id == name for t in node.targets
+        ):
+            lines = src.splitlines(keepends=True)
+            return (
+                "".join(lines[:node.lineno - 1])
+                + new_block + "\n"
+                + "".join(lines[node.end_lineno:])
+            )
+    raise ValueError(f"{name} の定義が config.py に見つかりません")
+
+
 def _render_band_params(bands: list[dict]) -> str:
     """MC_BAND_PARAMS リストを Python ソースとして文字列化する。"""
     band_labels = [
@@ -221,6 +260,50 @@ def _render_band_params(bands: list[dict]) -> str:
 #  Bot 再起動
 # ══════════════════════════════════════════════════════════════
 
+# Bot 停止の待機時間（秒）と、終了通知が使えない環境での確認間隔（秒）
+_STOP_TIMEOUT       = 10.0
+_STOP_POLL_INTERVAL = 0.05
+
+
+def _wait_for_exit(pid: int, timeout: float) -> bool:
+    """
+    pid のプロセスが終了するまで最大 timeout 秒待つ。終了を確認できたら True。
+    Bot はこのエディタの子プロセスではないため waitpid は使えない。
+    psutil があればそれで、Linux では pidfd で終了を即座に検知し、それ以外は短い間隔で確認する。
+    """
+    if psutil is not None:
+        try:
+            psutil.Process(pid).wait(timeout=timeout)
+        except psutil.NoSuchProcess:
+            pass
+        except psutil.TimeoutExpired:
+            return False
+        return True
+
+    if hasattr(os, "pidfd_open"):
+        try:
+            fd = os.pidfd_open(pid)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            pass  # カーネルが pidfd 非対応 → ポーリングへ
+        else:
+            try:
+                # プロセス終了時に pidfd が読み込み可能になる
+                return bool(select.select([fd], [], [], timeout)[0])
+            finally:
+                os.close(fd)
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            os.kill(pid, 0)  # プロセスが生きているか確認
+        except ProcessLookupError:
+            return True
+        time.sleep(_STOP_POLL_INTERVAL)
+    return False
+
+
 def _restart_bot():
     """PID ファイルで動いている Bot を停止して再起動する。"""
     # Bot の停止
@@ -231,13 +314,7 @@ def _restart_bot():
             print(f"  Bot (PID={pid}) を停止しています...")
             os.kill(pid, signal.SIGTERM)
             # 最大 10 秒待つ
-            for _ in range(20):
-                time.sleep(0.5)
-                try:
-                    os.kill(pid, 0)  # プロセスが生きているか確認
-                except ProcessLookupError:
-                    break
-            else:
+            if not _wait_for_exit(pid, _STOP_TIMEOUT):
                 print("  ⚠️  Botの停止を確認できませんでした。手動で確認してください。")
                 return
         except (ValueError, ProcessLookupError, PermissionError) as e:
@@ -245,20 +322,39 @@ def _restart_bot():
     else:
         print("  .bot.pid が見つかりません。Botは起動していないか、手動で起動してください。")
 
-    # Bot の再起動（新しいターミナルウィンドウで起動）
     bot_script  = os.path.join(SCRIPT_DIR, "bot.py")
     venv_python = os.path.join(SCRIPT_DIR, ".venv", "bin", "python3")
     python_exe  = venv_python if os.path.exists(venv_python) else sys.executable
 
-    print("  Botを新しいターミナルで再起動しています...")
-    cmd = f"cd {shlex.quote(SCRIPT_DIR)} && {shlex.quote(python_exe)} {shlex.quote(bot_script)}"
-    apple_script = f'tell application "Terminal" to do script "{cmd}"'
-    subprocess.Popen(["osascript", "-e", apple_script])
+    if sys.platform == "darwin" and shutil.which("osascript"):
+        # macOS: ログが見えるよう新しいターミナルウィンドウで起動
+        print("  Botを新しいターミナルで再起動しています...")
+        cmd = f"cd {shlex.quote(SCRIPT_DIR)} && {shlex.quote(python_exe)} {shlex.quote(bot_script)}"
+        apple_script = f'tell application "Terminal" to do script "{cmd}"'
+        subprocess.Popen(["osascript", "-e", apple_script])
+        started_msg = "  ✅ Botを新しいターミナルで再起動しました。"
+        failed_msg  = "  ⚠️  Botの起動を確認できませんでした。新しいターミナルウィンドウを確認してください。"
+    else:
+        # その他の環境: エディタから切り離したバックグラウンドプロセスとして起動
+        # （ログは Bot 自身が scanner.log に書くため、標準出力は捨てる。確認は logs.sh で）
+        print("  Botをバックグラウンドで再起動しています...")
+        subprocess.Popen(
+            [python_exe, bot_script],
+            cwd=SCRIPT_DIR,
+            start_new_session=True,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            close_fds=True,
+        )
+        started_msg = "  ✅ Botをバックグラウンドで再起動しました（ログ確認: bash logs.sh）。"
+        failed_msg  = "  ⚠️  Botの起動を確認できませんでした。scanner.log を確認してください。"
+
     time.sleep(2)
     if os.path.exists(PID_FILE):
-        print("  ✅ Botを新しいターミナルで再起動しました。")
+        print(started_msg)
     else:
-        print("  ⚠️  Botの起動を確認できませんでした。新しいターミナルウィンドウを確認してください。")
+        print(failed_msg)
 
 
 # ══════════════════════════════════════════════════════════════
@@ -2,23 +2,23 @@ from __future__ import annotations
 
 import logging
 import random
-import time
-
-import requests
 
 import config
+import gt_fetcher
 
 logger = logging.getLogger(__name__)
 
 _GT_TRENDING_URL = f"{config.GT_BASE_URL}/networks/solana/trending_pools"
 
+# 1回のスキャンで対象にするプール数
+_PICK_COUNT = 10
+
 
 def get_filtered_pairs() -> list[dict]:
     """
     GeckoTerminal のトレンドプール一覧（Solana）を取得し、以下の順でフィルタリングする：
       1. MCレンジ（MC_MIN〜MC_MAX）と流動性（LIQ_MIN以上）でフィルタ
-      2. MCの降順でソート
-      3. ランダムに10件を選択
+      2. ランダムに10件を選択
 
     Returns: ランダムに選んだ最大10件のペアリスト（正規化済み辞書）
     """
@@ -27,7 +27,8 @@ def get_filtered_pairs() -> list[dict]:
     # page=1 で20件取得（無料プランは1ページのみ）
     for page in (1, 2):
         try:
-            resp = requests.get(
+            gt_fetcher.wait_rate_limit()
+            resp = gt_fetcher.SESSION.get(
                 _GT_TRENDING_URL,
                 params={"page": page, "duration": config.GT_TRENDING_DURATION},
                 headers=config.GT_HEADERS,
@@ -38,34 +39,46 @@ def get_filtered_pairs() -> list[dict]:
             logger.error(f"GeckoTerminal trending_pools APIリクエスト失敗 (page={page}): {e}")
             break
 
-        pools = resp.json().get("data", [])
+        pools = gt_fetcher.load_json(resp).get("data", [])
         if not pools:
             break
         all_pools.extend(pools)
-        time.sleep(config.GT_REQUEST_INTERVAL)
 
-    filtered = []
-    for pool in all_pools:
+    # 全件をシャッフルせず、必要な件数だけ無作為抽出する（抽出結果の順序もランダム）
+    filtered = list(_iter_valid_pools(all_pools))
+    top      = random.sample(filtered, min(_PICK_COUNT, len(filtered)))
+
+    return [_normalize(p) for p in top]
+
+
+def _iter_valid_pools(pools: list[dict]):
+    """MCレンジと流動性の条件を満たすプールを、_mc / _liq を付けて順に返す。"""
+    mc_min  = config.MC_MIN
+    mc_max  = config.MC_MAX
+    liq_min = config.LIQ_MIN
+    for pool in pools:
         attrs = pool.get("attributes", {})
         mc  = _to_float(attrs.get("market_cap_usd") or attrs.get("fdv_usd"))
         liq = _to_float(attrs.get("reserve_in_usd"))
 
         if mc == 0:
             continue
-        if config.MC_MIN <= mc <= config.MC_MAX and liq >= config.LIQ_MIN:
+        if mc_min <= mc <= mc_max and liq >= liq_min:
             pool["_mc"] = mc
             pool["_liq"] = liq
-            filtered.append(pool)
-
-    random.shuffle(filtered)
-    top = filtered[:10]
-
-    return [_normalize(p) for p in top]
+            yield pool
 
 
 def _to_float(value) -> float:
+    # 数値はそのまま返す（API の値は文字列のことが多いが、数値で返る項目もある）
+    if isinstance(value, float):
+        return value
+    if isinstance(value, int):
+        return float(value)
+    if not value:
+        return 0.0
     try:
-        return float(value or 0)
+        return float(value)
     except (TypeError, ValueError):
         return 0.0
 
@@ -1,47 +1,133 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import threading
 import time
+from typing import TYPE_CHECKING
 
-import pandas as pd
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 import config
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # orjson が無い環境では標準の json（requests の resp.json）を使う
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# GeckoTerminal API リトライ設定（429 / 5xx を自動リトライ。Retry-After ヘッダがあればそれに従う）
+_MAX_RETRIES   = 3
+_RETRY_BACKOFF = 5.0   # リトライ待機の基準秒数（1回目は即時、以降 10 → 20 秒と倍増）
+
+
+def _create_session() -> requests.Session:
+    retry = Retry(
+        total=_MAX_RETRIES,
+        backoff_factor=_RETRY_BACKOFF,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+        raise_on_status=False,   # リトライを使い切ったら最後のレスポンスを返し、raise_for_status で扱う
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=config.GT_MAX_CONCURRENCY * 2, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    return session
+
+
+# 全モジュールで共有する HTTP セッション（接続を使い回して TLS ハンドシェイクを省く）
+SESSION = _create_session()
+
+
+def load_json(resp: requests.Response):
+    """
+    レスポンス本文を JSON として読み込む。本文が空の場合はパースせず {} を返す。
+    orjson があればそちらで高速にパースする。
+    """
+    body = resp.content
+    if not body:
+        return {}
+    if orjson is not None:
+        return orjson.loads(body)
+    return resp.json()
+
+
+# GeckoTerminal へのリクエスト開始間隔を全モジュール・全スレッドで共有するゲート
+# （ロック内では自分の開始時刻の枠を予約するだけにし、待機はロックを離してから行う）
+_gt_lock = threading.Lock()
+_gt_last = 0.0   # 最後に予約された開始時刻[monotonic秒]
+
+
+def wait_rate_limit():
+    """
+    GeckoTerminal へリクエストする直前に呼ぶ。前回の予約から GT_REQUEST_INTERVAL 秒後の枠を予約し、その時刻まで待機する。
+    待っている間ロックを持たないため、後続の呼び出しは眠っているスレッドの後ろで詰まらず、すぐ次の枠を予約できる。
+    """
+    global _gt_last
+    with _gt_lock:
+        now      = time.monotonic()
+        slot     = max(now, _gt_last + config.GT_REQUEST_INTERVAL)
+        _gt_last = slot
+    delay = slot - now
+    if delay > 0:
+        time.sleep(delay)
+
+
+# get_pool_address の結果キャッシュ: token_address → (取得時刻[monotonic秒], プールアドレス or None)
+# プールが見つからなかった結果は短めに保持する（新規プールが作られる可能性があるため）
+_POOL_CACHE: dict[str, tuple[float, str | None]] = {}
+_POOL_CACHE_TTL          = 3600   # 秒
+_POOL_CACHE_NEGATIVE_TTL = 300    # 秒
+
 
 def get_pool_address(token_address: str) -> str | None:
     """
     トークンアドレス → 最流動性プールアドレスを取得。
     取得失敗またはデータなしの場合は None を返す。
+    結果は _POOL_CACHE_TTL 秒（データなしは _POOL_CACHE_NEGATIVE_TTL 秒）キャッシュする。
+    通信エラーはキャッシュしない。
     """
+    now = time.monotonic()
+    hit = _POOL_CACHE.get(token_address)
+    if hit is not None:
+        fetched_at, address = hit
+        ttl = _POOL_CACHE_TTL if address is not None else _POOL_CACHE_NEGATIVE_TTL
+        if now - fetched_at < ttl:
+            return address
+
     url = f"{config.GT_BASE_URL}/networks/{config.CHAIN}/tokens/{token_address}/pools"
     try:
-        resp = requests.get(url, headers=config.GT_HEADERS, params={"page": 1}, timeout=10)
+        wait_rate_limit()
+        resp = SESSION.get(url, headers=config.GT_HEADERS, params={"page": 1}, timeout=10)
         resp.raise_for_status()
-        data = resp.json().get("data", [])
-        if not data:
-            return None
-        return data[0]["attributes"]["address"]
+        data = load_json(resp).get("data", [])
+        address = data[0]["attributes"]["address"] if data else None
     except Exception as e:
         logger.warning(f"プールアドレス取得失敗 ({token_address}): {e}")
         return None
 
-
-_MAX_RETRIES = 3
-_RETRY_WAIT  = 10.0  # 429時のリトライ待機秒数
+    _POOL_CACHE[token_address] = (now, address)
+    return address
 
 
 def fetch_ohlcv(pool_address: str, mc: float) -> pd.DataFrame | None:
     """
     プールアドレスとMCを受け取り、MC帯に応じた時間軸のOHLCVを返す。
     columns: ["timestamp", "open", "high", "low", "close", "volume"]
-    429 Too Many Requests の場合は最大 _MAX_RETRIES 回リトライする。
+    429 Too Many Requests / 5xx の場合は SESSION が最大 _MAX_RETRIES 回リトライする。
     取得失敗の場合は None を返す。
     """
-    mc_params = config.get_mc_params(mc)
-    aggregate = mc_params["ohlcv_aggregate"]
+    # pandas は OHLCV を組み立てるときに初めて読み込む（設定エディタなど DataFrame を使わない経路の起動を軽くする）
+    import pandas as pd
+
+    aggregate = config.get_mc_params(mc).ohlcv_aggregate
 
     url = (
         f"{config.GT_BASE_URL}/networks/{config.CHAIN}"
@@ -54,39 +140,47 @@ def fetch_ohlcv(pool_address: str, mc: float) -> pd.DataFrame | None:
         "token":     "base",
     }
 
-    for attempt in range(_MAX_RETRIES + 1):
-        try:
-            resp = requests.get(url, headers=config.GT_HEADERS, params=params, timeout=10)
-            resp.raise_for_status()
-            raw = resp.json()["data"]["attributes"]["ohlcv_list"]
-            raw.reverse()  # 降順 → 昇順（古い順）に変換
-
-            df = pd.DataFrame(raw, columns=["timestamp", "open", "high", "low", "close", "volume"])
-            df["timestamp"] = pd.to_datetime(df["timestamp"], unit="s")
-            df = df.astype({
-                "open":   float,
-                "high":   float,
-                "low":    float,
-                "close":  float,
-                "volume": float,
-            })
-            return df
-        except requests.exceptions.HTTPError as e:
-            if resp.status_code == 429 and attempt < _MAX_RETRIES:
-                wait = _RETRY_WAIT * (attempt + 1)
-                logger.warning(
-                    f"OHLCV 429 レート制限 ({pool_address}) "
-                    f"→ {wait:.0f}秒後にリトライ ({attempt + 1}/{_MAX_RETRIES})"
-                )
-                time.sleep(wait)
-                continue
-            logger.warning(f"OHLCV取得失敗 ({pool_address}): {e}")
-            return None
-        except Exception as e:
-            logger.warning(f"OHLCV取得失敗 ({pool_address}): {e}")
-            return None
-
-    return None
+    try:
+        wait_rate_limit()
+        resp = SESSION.get(url, headers=config.GT_HEADERS, params=params, timeout=10)
+        resp.raise_for_status()
+        raw = load_json(resp)["data"]["attributes"]["ohlcv_list"]
+        # float64 の2次元配列に一度で変換し、降順 → 昇順（古い順）はビューの反転で行う
+        arr = np.asarray(raw, dtype=np.float64).reshape(-1, 6)[::-1]
+        # Unix秒 → datetime64 は NumPy の型変換だけで行う（pd.to_datetime の型判定を通さない）
+        ts  = arr[:, 0].astype(np.int64).view("datetime64[s]").astype("datetime64[ns]")
+
+        return pd.DataFrame(
+            {
+                "timestamp": ts,
+                "open":      arr[:, 1],
+                "high":      arr[:, 2],
+                "low":       arr[:, 3],
+                "close":     arr[:, 4],
+                "volume":    arr[:, 5],
+            },
+            copy=False,
+        )
+    except Exception as e:
+        logger.warning(f"OHLCV取得失敗 ({pool_address}): {e}")
+        return None
+
+
+# fetch_ohlcv_async の同時実行数制限（イベントループ上で初めて使うときに作る）
+_fetch_sem: asyncio.Semaphore | None = None
+
+
+async def fetch_ohlcv_async(pool_address: str, mc: float) -> pd.DataFrame | None:
+    """
+    fetch_ohlcv をワーカースレッドで実行する非同期版。
+    同時実行は GT_MAX_CONCURRENCY 件まで。リクエスト開始間隔は wait_rate_limit() が守るため、
+    複数ペアを gather しても API への負荷は変わらず、応答待ちだけが重なる。
+    """
+    global _fetch_sem
+    if _fetch_sem is None:
+        _fetch_sem = asyncio.Semaphore(config.GT_MAX_CONCURRENCY)
+    async with _fetch_sem:
+        return await asyncio.to_thread(fetch_ohlcv, pool_address, mc)
 
 
 if __name__ == "__main__":
@@ -108,7 +202,6 @@ if __name__ == "__main__":
         print(f"プールアドレス: {pool_addr}")
 
         if pool_addr:
-            time.sleep(config.GT_REQUEST_INTERVAL)
             df = fetch_ohlcv(pool_addr, pair["mc"])
             if df is not None:
                 print(f"\nOHLCV取得: {len(df)}本")
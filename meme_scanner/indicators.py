@@ -1,68 +1,209 @@
+from __future__ import annotations
+
 import logging
+from typing import TYPE_CHECKING, NamedTuple
 
-import pandas as pd
+import numpy as np
 
 from config import RSI_PERIOD, ATR_PERIOD
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 logger = logging.getLogger(__name__)
 
 
-def calc_rsi(closes: pd.Series, period: int = RSI_PERIOD) -> float:
+class Candles(NamedTuple):
+    """
+    スコア計算に使う OHLCV の各列を float64 の NumPy 配列で持つ（列ごとの配列 = SoA）。
+    DataFrame からの列の取り出しは from_df で1回だけ行い、各指標の計算で共有する。
+    """
+    high:    np.ndarray
+    low:     np.ndarray
+    close:   np.ndarray
+    volume:  np.ndarray
+    typical: np.ndarray   # (high + low + close) / 3
+
+    @classmethod
+    def from_df(cls, df: pd.DataFrame) -> Candles:
+        high, low, close = _hlc(df)
+        return cls(
+            high=high,
+            low=low,
+            close=close,
+            volume=df["volume"].to_numpy(dtype=np.float64),
+            typical=(high + low + close) / 3,
+        )
+
+
+def _wilder_ewm(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Wilder平滑化 — pandas の ewm(alpha=1/period, min_periods=period, adjust=False).mean() と同じ結果を返す。
+    数百本程度の配列では pandas の ewm を呼ぶより Python のループ1回の方が速い。
+    NaN の扱いも pandas と揃える（NaN の間も過去の重みは減衰し、period 本の観測値が揃うまでは NaN）。
+    """
+    alpha    = 1.0 / period
+    decay    = 1.0 - alpha
+    out      = np.empty(len(values))
+    weighted = float("nan")
+    old_wt   = 1.0
+    nobs     = 0
+    for i, cur in enumerate(values.tolist()):
+        is_obs = cur == cur
+        nobs  += is_obs
+        if weighted == weighted:
+            old_wt *= decay
+            if is_obs:
+                if weighted != cur:
+                    weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+                old_wt = 1.0
+        elif is_obs:
+            weighted = cur
+        out[i] = weighted if nobs >= period else np.nan
+    return out
+
+
+def _rsi_array(closes: np.ndarray, period: int) -> np.ndarray:
+    delta    = np.empty(len(closes))
+    delta[0] = np.nan
+    np.subtract(closes[1:], closes[:-1], out=delta[1:])
+    gain     = np.maximum(delta, 0.0)    # NaN はそのまま残る（clip と同じ）
+    loss     = -np.minimum(delta, 0.0)
+    avg_gain = _wilder_ewm(gain, period)
+    avg_loss = _wilder_ewm(loss, period)
+    # avg_loss == 0 のときは rs = 0（pandas 版の replace(0, inf) と同じ挙動）。0 の要素は割り算自体を行わない
+    rs = np.divide(avg_gain, avg_loss, out=np.zeros(len(closes)), where=avg_loss != 0)
+    return 100 - (100 / (1 + rs))
+
+
+def calc_rsi(closes: pd.Series | np.ndarray, period: int = RSI_PERIOD) -> float:
     """RSI(9) — Wilder平滑化（EWM）"""
-    return float(calc_rsi_series(closes, period).iloc[-1])
+    return float(_rsi_array(np.asarray(closes, dtype=np.float64), period)[-1])
 
 
 def calc_rsi_series(closes: pd.Series, period: int = RSI_PERIOD) -> pd.Series:
     """RSI(9) — 全インデックス分のSeries を返す"""
-    delta    = closes.diff()
-    gain     = delta.clip(lower=0)
-    loss     = -delta.clip(upper=0)
-    avg_gain = gain.ewm(alpha=1 / period, min_periods=period, adjust=False).mean()
-    avg_loss = loss.ewm(alpha=1 / period, min_periods=period, adjust=False).mean()
-    rs       = avg_gain / avg_loss.replace(0, float("inf"))
-    return 100 - (100 / (1 + rs))
+    import pandas as pd
+
+    return pd.Series(
+        _rsi_array(closes.to_numpy(dtype=np.float64), period),
+        index=closes.index,
+    )
 
 
 def calc_atr(df: pd.DataFrame, period: int = ATR_PERIOD) -> float:
     """ATR(14) — True Range の EWM"""
-    return float(calc_atr_series(df, period).iloc[-1])
+    high, low, close = _hlc(df)
+    return float(_atr_array(high, low, close, period)[-1])
 
 
 def calc_atr_series(df: pd.DataFrame, period: int = ATR_PERIOD) -> pd.Series:
     """ATR(14) — 全インデックス分のSeries を返す"""
-    high       = df["high"]
-    low        = df["low"]
-    close      = df["close"]
-    prev_close = close.shift(1)
-    tr = pd.concat(
-        [
-            high - low,
-            (high - prev_close).abs(),
-            (low  - prev_close).abs(),
-        ],
-        axis=1,
-    ).max(axis=1)
-    return tr.ewm(alpha=1 / period, min_periods=period, adjust=False).mean()
+    import pandas as pd
+
+    return pd.Series(_atr_array(*_hlc(df), period), index=df.index)
+
+
+def _hlc(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    return (
+        df["high"].to_numpy(dtype=np.float64),
+        df["low"].to_numpy(dtype=np.float64),
+        df["close"].to_numpy(dtype=np.float64),
+    )
+
+
+def _atr_array(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int) -> np.ndarray:
+    prev_close     = np.empty(len(close))
+    prev_close[:1] = np.nan
+    prev_close[1:] = close[:-1]
+    # np.fmax は NaN を無視する（先頭足は前の終値が無いため high - low になる。pandas の max と同じ）
+    tr = np.fmax(
+        np.fmax(high - low, np.abs(high - prev_close)),
+        np.abs(low - prev_close),
+    )
+    return _wilder_ewm(tr, period)
 
 
 def calc_vwap(df: pd.DataFrame) -> float:
     """VWAP（全期間）"""
-    typical   = (df["high"] + df["low"] + df["close"]) / 3
-    total_vol = df["volume"].sum()
+    c = Candles.from_df(df)
+    return _vwap_value(c.typical, c.close, c.volume)
+
+
+def _vwap_value(typical: np.ndarray, close: np.ndarray, volume: np.ndarray) -> float:
+    # NaN を除いて合計する（pandas の sum と同じ）
+    total_vol = np.nansum(volume)
     if total_vol == 0:
-        return float(df["close"].iloc[-1])
-    return float((typical * df["volume"]).sum() / total_vol)
+        return float(close[-1])
+    return float(np.nansum(typical * volume) / total_vol)
+
+
+def _vwap_array(typical: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """
+    各足時点までの累積VWAP（i本目までのデータだけを使うため Look-ahead bias なし）。
+    pandas の cumsum と同じく NaN の足は NaN にし、以降の累積からは除外する。累積出来高 0 の足も NaN。
+    """
+    tpv     = typical * volume
+    cum_tpv = np.nancumsum(tpv)
+    cum_vol = np.nancumsum(volume)
+    cum_tpv[np.isnan(tpv)]    = np.nan
+    cum_vol[np.isnan(volume)] = np.nan
+    # 累積出来高 0 の足は割り算を行わず NaN のまま残す
+    return np.divide(cum_tpv, cum_vol, out=np.full(len(volume), np.nan), where=cum_vol != 0)
 
 
 def calc_volume_surge(df: pd.DataFrame) -> float:
     """直近1本 vs 直前20本平均の出来高倍率"""
-    recent = df["volume"].iloc[-1]
-    avg    = df["volume"].iloc[-21:-1].mean()
+    return _volume_surge_value(df["volume"].to_numpy(dtype=np.float64))
+
+
+def _volume_surge_value(volume: np.ndarray) -> float:
+    recent = volume[-1]
+    window = volume[-21:-1]
+    # NaN を除いた平均（pandas の mean と同じく、NaN を 0 にして合計し有効本数で割る）
+    valid  = ~np.isnan(window)
+    count  = int(valid.sum())
+    avg    = np.where(valid, window, 0.0).sum() / count if count else np.nan
     return float(recent / avg) if avg > 0 else 0.0
 
 
+def _volume_surge_array(volume: np.ndarray, window: int = 20) -> np.ndarray:
+    """
+    各足の出来高 ÷ 直前 window 本の平均出来高。
+    直前 window 本が揃わない足・窓内に NaN がある足・平均 0 の足は NaN。
+    """
+    out = np.full(len(volume), np.nan)
+    if len(volume) > window:
+        avg = np.lib.stride_tricks.sliding_window_view(volume[:-1], window).mean(axis=1)
+        # 平均 0 の足は割り算を行わず NaN のまま残す
+        np.divide(volume[window:], avg, out=out[window:], where=avg != 0)
+    return out
+
+
+def compute_all(candles: Candles) -> dict:
+    """
+    スコア計算に使う指標をまとめて計算する。
+    Candles の配列を全指標で共有する。
+
+    Returns:
+        rsi, atr, vwap, vol_surge, close（最新足の終値）,
+        rsi_series, atr_series（全足分の RSI / ATR の ndarray。再現性の計算で使い回す）
+    """
+    high, low, close, volume, typical = candles
+    rsi_series = _rsi_array(close, RSI_PERIOD)
+    atr_series = _atr_array(high, low, close, ATR_PERIOD)
+    return {
+        "rsi":        float(rsi_series[-1]),
+        "atr":        float(atr_series[-1]),
+        "vwap":       _vwap_value(typical, close, volume),
+        "vol_surge":  _volume_surge_value(volume),
+        "close":      float(close[-1]),
+        "rsi_series": rsi_series,
+        "atr_series": atr_series,
+    }
+
+
 if __name__ == "__main__":
-    import time
     import logging
     import dex_scanner
     import gt_fetcher
@@ -80,7 +221,6 @@ if __name__ == "__main__":
         pair = pairs[0]
         pool_addr = gt_fetcher.get_pool_address(pair["token_address"])
         if pool_addr:
-            time.sleep(config.GT_REQUEST_INTERVAL)
             df = gt_fetcher.fetch_ohlcv(pool_addr, pair["mc"])
             if df is not None and len(df) >= config.MIN_CANDLES:
                 rsi        = calc_rsi(df["close"])
@@ -1,34 +1,38 @@
-import pandas as pd
+from __future__ import annotations
 
+from typing import TYPE_CHECKING
 
-# 価格位置スコア（PPS）の加減点テーブル
+import numpy as np
+
+from indicators import Candles
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# 価格位置スコア（PPS）ごとの (ラベル, 星, 加減点) — インデックスは pps - 1
 # 安値圏ほど高得点（星が多い）、高値圏ほど減点
-_PPS_BONUS = {
-    5: +10,   # ⭐⭐⭐⭐⭐ 強い安値圏
-    4: +5,    # ⭐⭐⭐⭐  やや安値圏
-    3:  0,    # ⭐⭐⭐   中間
-    2: -5,    # ⭐⭐     やや高値圏
-    1: -10,   # ⭐       強い高値圏
-}
-
-_PPS_LABEL = {
-    5: "強い安値圏",
-    4: "やや安値圏",
-    3: "中間",
-    2: "やや高値圏",
-    1: "強い高値圏",
-}
-
-_PPS_STARS = {
-    5: "⭐⭐⭐⭐⭐",
-    4: "⭐⭐⭐⭐",
-    3: "⭐⭐⭐",
-    2: "⭐⭐",
-    1: "⭐",
-}
-
-
-def calc_price_position(df: pd.DataFrame, vwap: float, rsi: float) -> dict:
+_PPS_TABLE = (
+    ("強い高値圏", "⭐",         -10.0),   # PPS=1
+    ("やや高値圏", "⭐⭐",        -5.0),   # PPS=2
+    ("中間",       "⭐⭐⭐",        0.0),   # PPS=3
+    ("やや安値圏", "⭐⭐⭐⭐",      +5.0),   # PPS=4
+    ("強い安値圏", "⭐⭐⭐⭐⭐",   +10.0),   # PPS=5
+)
+
+# 各軸の段階境界（値がこの境界「以下」なら、その段階の星の数になる）
+#   値 <= th[0] → 5, <= th[1] → 4, <= th[2] → 3, <= th[3] → 2, それ以外 → 1
+_RANGE_THRESHOLDS    = np.array([0.20, 0.40, 0.60, 0.80])   # レンジ内位置
+_VWAP_DEV_THRESHOLDS = np.array([-5.0, -1.0, +1.0, +5.0])   # VWAP乖離率（%）
+_RSI_THRESHOLDS      = np.array([30.0, 45.0, 55.0, 70.0])   # RSI
+
+
+def _to_axis(thresholds: np.ndarray, value: float) -> int:
+    """value を 5段階（5=安値圏〜1=高値圏）に変換する。NaN は 1 になる（比較がすべて偽になる従来の分岐と同じ）。"""
+    return 5 - int(np.searchsorted(thresholds, value, side="left"))
+
+
+def calc_price_position(df: pd.DataFrame | Candles, vwap: float, rsi: float) -> dict:
     """
     現在の価格が直近レンジの中でどの位置にいるかを5段階で評価する。
     安値圏ほど星が多く（PPS=5）、高値圏ほど星が少ない（PPS=1）。
@@ -42,7 +46,7 @@ def calc_price_position(df: pd.DataFrame, vwap: float, rsi: float) -> dict:
          低いほど安値圏（売られすぎ）
 
     Args:
-        df   : OHLCVのDataFrame（100本）
+        df   : OHLCVのDataFrame（100本）、または変換済みの Candles
         vwap : 計算済みVWAP値
         rsi  : 計算済みRSI値
 
@@ -55,11 +59,13 @@ def calc_price_position(df: pd.DataFrame, vwap: float, rsi: float) -> dict:
         vwap_dev   : float VWAPからの乖離率（%）
         rsi_val    : float RSI値（参照用）
     """
-    close = float(df["close"].iloc[-1])
+    candles = df if isinstance(df, Candles) else Candles.from_df(df)
+    close   = float(candles.close[-1])
 
     # ── 軸1: レンジ内位置（0.0〜1.0、低いほど安値圏） ─────────────────
-    highest = float(df["high"].max())
-    lowest  = float(df["low"].min())
+    # fmax/fmin.reduce は NaN を無視する（pandas の max/min と同じ）
+    highest = float(np.fmax.reduce(candles.high))
+    lowest  = float(np.fmin.reduce(candles.low))
     rang    = highest - lowest
 
     if rang > 0:
@@ -68,16 +74,7 @@ def calc_price_position(df: pd.DataFrame, vwap: float, rsi: float) -> dict:
         range_pct = 0.5
 
     # レンジ内位置 → 5段階（低いほど安値圏 → 星多い）
-    if range_pct <= 0.20:
-        axis1 = 5
-    elif range_pct <= 0.40:
-        axis1 = 4
-    elif range_pct <= 0.60:
-        axis1 = 3
-    elif range_pct <= 0.80:
-        axis1 = 2
-    else:
-        axis1 = 1
+    axis1 = _to_axis(_RANGE_THRESHOLDS, range_pct)
 
     # ── 軸2: VWAPからの乖離率（マイナスほど安値圏 → 星多い） ────────────
     if vwap > 0:
@@ -85,38 +82,22 @@ def calc_price_position(df: pd.DataFrame, vwap: float, rsi: float) -> dict:
     else:
         vwap_dev = 0.0
 
-    if vwap_dev <= -5.0:
-        axis2 = 5
-    elif vwap_dev <= -1.0:
-        axis2 = 4
-    elif vwap_dev <= +1.0:
-        axis2 = 3
-    elif vwap_dev <= +5.0:
-        axis2 = 2
-    else:
-        axis2 = 1
+    axis2 = _to_axis(_VWAP_DEV_THRESHOLDS, vwap_dev)
 
     # ── 軸3: RSIの位置（低いほど安値圏 → 星多い） ───────────────────────
-    if rsi <= 30:
-        axis3 = 5
-    elif rsi <= 45:
-        axis3 = 4
-    elif rsi <= 55:
-        axis3 = 3
-    elif rsi <= 70:
-        axis3 = 2
-    else:
-        axis3 = 1
+    axis3 = _to_axis(_RSI_THRESHOLDS, rsi)
 
     # ── 3軸の平均で最終PPS決定（四捨五入） ──────────────────────────────
     raw = (axis1 + axis2 + axis3) / 3.0
     pps = max(1, min(5, round(raw)))
 
+    label, stars, bonus = _PPS_TABLE[pps - 1]
+
     return {
         "pps":       pps,
-        "pps_label": _PPS_LABEL[pps],
-        "pps_stars": _PPS_STARS[pps],
-        "pps_bonus": float(_PPS_BONUS[pps]),
+        "pps_label": label,
+        "pps_stars": stars,
+        "pps_bonus": bonus,
         "range_pct": round(range_pct, 3),
         "vwap_dev":  round(vwap_dev, 2),
         "rsi_val":   round(rsi, 1),
@@ -1,13 +1,65 @@
+from __future__ import annotations
+
 import logging
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING
 
-import pandas as pd
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 import config
+from indicators import Candles, _atr_array, _rsi_array, _volume_surge_array, _vwap_array
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+try:
+    from numba import njit
+except ImportError:  # numba が無い環境では同じ関数を Python のまま実行する
+    njit = None
 
 logger = logging.getLogger(__name__)
 
 
-def calc_reproducibility(df: pd.DataFrame, mc: float) -> dict:
+def _count_wins(
+    candidates: np.ndarray, close: np.ndarray, high: np.ndarray, low: np.ndarray, atr: np.ndarray,
+    lookforward: int, atr_sl_mult: float, atr_tp_mult: float,
+) -> int:
+    """
+    シグナル足ごとに SL/TP のどちらに先に触れたかを判定し、TP に先に触れた（win）回数を返す。
+    同一ローソク足で SL/TP 両方に触れた場合は判定不能（失敗扱い）、どちらにも触れなければ open（失敗扱い）。
+    スカラーのループのみで書いているため、numba があれば機械語にコンパイルされる。
+    """
+    wins = 0
+    for j in range(len(candidates)):
+        i  = candidates[j]
+        sl = close[i] - atr[i] * atr_sl_mult
+        tp = close[i] + atr[i] * atr_tp_mult
+        for k in range(i + 1, i + 1 + lookforward):
+            hit_sl = low[k]  <= sl
+            hit_tp = high[k] >= tp
+            if hit_sl or hit_tp:
+                # 最初に触れた足で確定: TPのみなら win（1）、SLのみ・両方なら 0 を分岐なしで加算
+                wins += int(hit_tp > hit_sl)
+                break
+    return wins
+
+
+if njit is not None:
+    # fastmath は NaN を含まない前提の最適化を行うため使わない（NaN の足は「触れていない」と判定する必要がある）
+    _count_wins = njit(cache=True)(_count_wins)
+
+
+def calc_reproducibility(
+    df: pd.DataFrame | Candles,
+    mc: float,
+    *,
+    rsi_series=None,
+    atr_series=None,
+    vwap_series=None,
+    vol_surge_series=None,
+) -> dict:
     """
     過去の再現性（シグナル後に上昇した割合）を計算する。
 
@@ -19,8 +71,11 @@ def calc_reproducibility(df: pd.DataFrame, mc: float) -> dict:
       4. 成功率 50% 以上も差をつける（75% で満点）
 
     Args:
-        df    : OHLCVのDataFrame（100本）
+        df    : OHLCVのDataFrame（100本）、または変換済みの Candles
         mc    : 時価総額（MC帯判定に使用）
+        rsi_series / atr_series / vwap_series / vol_surge_series :
+                呼び出し側で計算済みの全足分の指標（Series または ndarray）。
+                省略したものだけここで計算する。
 
     Returns:
         reproducibility_score : float  再現性スコア（0〜25点）
@@ -29,83 +84,71 @@ def calc_reproducibility(df: pd.DataFrame, mc: float) -> dict:
         success_rate          : float  補正前の生の成功率（0.0〜1.0）
         adjusted_rate         : float  ベイズ補正後の成功率（0.0〜1.0）
     """
-    from indicators import calc_rsi_series, calc_atr_series
-
     mc_params        = config.get_mc_params(mc)
-    surge_min        = mc_params["volume_surge_min"]
-    aggregate        = mc_params["ohlcv_aggregate"]
-    rsi_overbought   = mc_params["rsi_overbought"]
-    atr_sl_mult      = mc_params["atr_sl_mult"]
-    atr_tp_mult      = mc_params["atr_tp_mult"]
+    surge_min        = mc_params.volume_surge_min
+    aggregate        = mc_params.ohlcv_aggregate
+    rsi_overbought   = mc_params.rsi_overbought
+    atr_sl_mult      = mc_params.atr_sl_mult
+    atr_tp_mult      = mc_params.atr_tp_mult
 
     # 60分 ÷ 時間軸（分） = 検証本数
     lookforward = int(60 / aggregate)  # 5分足→12, 15分足→4
 
-    signal_count  = 0
-    success_count = 0
-
     min_idx = max(config.RSI_PERIOD, config.ATR_PERIOD)  # = 14本目から（RSI/ATRは独立して計算されるためmaxが正しい）
 
-    # ── インジケーターをSeries化（ループ内での再計算を避ける） ────────────────
-    rsi_series = calc_rsi_series(df["close"])
-    atr_series = calc_atr_series(df)
+    candles = df if isinstance(df, Candles) else Candles.from_df(df)
+    close_arr, high_arr, low_arr = candles.close, candles.high, candles.low
 
-    # 出来高急増: 直近1本 vs 直前20本平均
-    vol_avg          = df["volume"].shift(1).rolling(20).mean()
-    vol_surge_series = df["volume"] / vol_avg.replace(0, float("nan"))
-
-    # VWAP: cumsumなのでi本目まででのVWAPになる（Look-ahead biasなし）
-    typical     = (df["high"] + df["low"] + df["close"]) / 3
-    cum_tpv     = (typical * df["volume"]).cumsum()
-    cum_vol     = df["volume"].cumsum()
-    vwap_series = cum_tpv / cum_vol.replace(0, float("nan"))
-
-    for i in range(min_idx, len(df) - lookforward - 1):
-        rsi       = float(rsi_series.iloc[i])
-        atr       = float(atr_series.iloc[i])
-        close_i   = float(df["close"].iloc[i])
-        vol_surge = float(vol_surge_series.iloc[i]) if not pd.isna(vol_surge_series.iloc[i]) else 0.0
-        vwap      = float(vwap_series.iloc[i])      if not pd.isna(vwap_series.iloc[i])      else close_i
-
-        # ── 改善1: シグナル条件を scorer.py と完全一致 ────────────────────────
-        # 出来高急増 AND VWAP上抜け の両方が必要（精度重視）
-        # RSI は 50 < RSI <= rsi_overbought のみ（過熱域は除外）
-        sig_volume = vol_surge >= surge_min
-        sig_vwap   = close_i > vwap
-        sig_rsi    = 50 < rsi <= rsi_overbought
-
-        # 出来高+VWAP両方 OR RSI単独での高品質シグナル
-        high_quality = (sig_volume and sig_vwap)
-        rsi_only     = sig_rsi and not (sig_volume or sig_vwap)
-
-        if not (high_quality or rsi_only):
-            continue
-
-        signal_count += 1
-
-        # ── 改善2: SL/TP を考慮した勝敗判定 ────────────────────────────────
-        sl = close_i - atr * atr_sl_mult
-        tp = close_i + atr * atr_tp_mult
-
-        future_df = df.iloc[i + 1 : i + 1 + lookforward]
-
-        outcome = "open"
-        for _, row in future_df.iterrows():
-            hit_sl = row["low"]  <= sl
-            hit_tp = row["high"] >= tp
-            if hit_sl and hit_tp:
-                # 同一ローソク足でSL/TP両方タッチ → 判定不能（失敗扱い）
-                outcome = "both"
-                break
-            elif hit_tp:
-                outcome = "win"
-                break
-            elif hit_sl:
-                outcome = "loss"
-                break
+    # ── インジケーターを全足分の配列で用意（ループ内での再計算を避ける。計算済みのものは使い回す） ──
+    if rsi_series is None:
+        rsi_series = _rsi_array(close_arr, config.RSI_PERIOD)
+    if atr_series is None:
+        atr_series = _atr_array(high_arr, low_arr, close_arr, config.ATR_PERIOD)
 
-        if outcome == "win":
-            success_count += 1
+    # 出来高急増: 直近1本 vs 直前20本平均
+    if vol_surge_series is None:
+        vol_surge_series = _volume_surge_array(candles.volume)
+
+    # VWAP: 累積なのでi本目まででのVWAPになる（Look-ahead biasなし）
+    if vwap_series is None:
+        vwap_series = _vwap_array(candles.typical, candles.volume)
+
+    # ── 改善1: シグナル条件を scorer.py と完全一致 ────────────────────────
+    # 出来高急増 AND VWAP上抜け の両方が必要（精度重視）
+    # RSI は 50 < RSI <= rsi_overbought のみ（過熱域は除外）
+    # 全足分の条件を NumPy のブール配列で一度に判定する。
+    # NaN との比較は False になるため、vol_surge=NaN→0 / vwap=NaN→終値 と置き換えた場合と同じ判定になる
+    rsi_arr   = np.asarray(rsi_series, dtype=np.float64)
+    atr_arr   = np.asarray(atr_series, dtype=np.float64)
+
+    sig_volume = np.asarray(vol_surge_series, dtype=np.float64) >= surge_min
+    sig_vwap   = close_arr > np.asarray(vwap_series, dtype=np.float64)
+    sig_rsi    = (rsi_arr > 50) & (rsi_arr <= rsi_overbought)
+
+    # 出来高+VWAP両方 OR RSI単独での高品質シグナル
+    high_quality = sig_volume & sig_vwap
+    rsi_only     = sig_rsi & ~(sig_volume | sig_vwap)
+    sig_mask     = high_quality | rsi_only
+
+    end_idx      = max(len(close_arr) - lookforward - 1, min_idx)
+    candidates   = np.flatnonzero(sig_mask[min_idx:end_idx]) + min_idx
+    signal_count = len(candidates)
+
+    # ── 改善2: SL/TP を考慮した勝敗判定（先に触れた方を優先） ─────────────────
+    # 検証期間中の最高値がTPに届かず最安値もSLに届かないシグナルは open（失敗扱い）で確定するため、
+    # 各足から見た先 lookforward 本の最高値・最安値を一度に求めて、どちらかに届くものだけ判定する
+    # （np.fmax / np.fmin は NaN を無視する。1本ずつ比べたときに NaN の足が「触れていない」扱いになるのと同じ）
+    success_count = 0
+    if signal_count:
+        future_high = np.fmax.reduce(sliding_window_view(high_arr[1:], lookforward)[candidates], axis=1)
+        future_low  = np.fmin.reduce(sliding_window_view(low_arr[1:],  lookforward)[candidates], axis=1)
+        sl          = close_arr[candidates] - atr_arr[candidates] * atr_sl_mult
+        tp          = close_arr[candidates] + atr_arr[candidates] * atr_tp_mult
+        reachable   = candidates[(future_high >= tp) | (future_low <= sl)]
+        success_count = int(_count_wins(
+            reachable, close_arr, high_arr, low_arr, atr_arr,
+            lookforward, float(atr_sl_mult), float(atr_tp_mult),
+        ))
 
     # ── 改善3: サンプル数を信頼性に反映（ベイズ補正） ────────────────────────
     # 仮想サンプル: 5件分の「50%成功率」を事前分布として加える
@@ -130,14 +173,10 @@ def calc_reproducibility(df: pd.DataFrame, mc: float) -> dict:
     #  50% ≤ rate < 75%     → 線形補間（12.5〜25点）
     #  rate ≥ 75%           → 満点 25点
     #
-    if adjusted_rate >= 0.75:
-        raw_score = 25.0
-    elif adjusted_rate >= 0.50:
-        raw_score = 12.5 + 12.5 * (adjusted_rate - 0.50) / 0.25
-    elif adjusted_rate >= 0.25:
-        raw_score = 12.5 * (adjusted_rate - 0.25) / 0.25
-    else:
-        raw_score = 0.0
+    #  2つの線形区間は傾きが同じ（25%あたり12.5点）なので、
+    #  25%〜75% を1本の直線にして 0〜25点に収める（分岐なし）
+    #
+    raw_score = min(max(50.0 * (adjusted_rate - 0.25), 0.0), 25.0)
 
     # 信頼度係数で割り引く
     reproducibility_score = raw_score * confidence
@@ -155,3 +194,35 @@ def calc_reproducibility(df: pd.DataFrame, mc: float) -> dict:
         "success_rate":          success_rate,
         "adjusted_rate":         adjusted_rate,
     }
+
+
+# calc_reproducibility_cached の結果キャッシュ: (プールアドレス, 最新足の時刻, MC帯, 本数) → 結果
+# スキャンごとに同じペアを再スコアしても、新しい足が出るまでは同じ結果を使い回す
+_REPRO_CACHE: OrderedDict[tuple, dict] = OrderedDict()
+_REPRO_CACHE_MAXSIZE = 256
+_repro_lock          = threading.Lock()
+
+
+def calc_reproducibility_cached(pool_address: str, last_ts, candles: Candles, mc: float, **series) -> dict:
+    """
+    calc_reproducibility の結果を (pool_address, last_ts, MC帯, 本数) ごとにキャッシュする版。
+
+    再現性の判定に使うのは最新足より前の足だけ（検証期間の最後は最新足の1本前）のため、
+    形成中の最新足の値が変わっても結果は変わらない。新しい足が出て last_ts が変われば再計算する。
+    キャッシュは最近使った順に _REPRO_CACHE_MAXSIZE 件まで保持する。
+    """
+    key = (pool_address, last_ts, config.get_mc_band_index(mc), len(candles.close))
+    with _repro_lock:
+        hit = _REPRO_CACHE.get(key)
+        if hit is not None:
+            _REPRO_CACHE.move_to_end(key)
+            return hit
+
+    result = calc_reproducibility(candles, mc, **series)
+
+    with _repro_lock:
+        _REPRO_CACHE[key] = result
+        _REPRO_CACHE.move_to_end(key)
+        if len(_REPRO_CACHE) > _REPRO_CACHE_MAXSIZE:
+            _REPRO_CACHE.popitem(last=False)
+    return result
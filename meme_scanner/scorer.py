@@ -1,14 +1,28 @@
-import logging
+from __future__ import annotations
 
-import pandas as pd
+import logging
+from typing import TYPE_CHECKING
 
 import config
-from indicators import calc_rsi, calc_atr, calc_vwap, calc_volume_surge
-from reproducibility import calc_reproducibility
+from indicators import Candles, compute_all
+from reproducibility import calc_reproducibility, calc_reproducibility_cached
 from price_position import calc_price_position
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 logger = logging.getLogger(__name__)
 
+# 再現性スコアの満点と、計算を省略したときに使う結果
+_REPRO_MAX_SCORE = 25.0
+_REPRO_SKIPPED   = {
+    "reproducibility_score": 0.0,
+    "signal_count":          0,
+    "success_count":         0,
+    "success_rate":          0.0,
+    "adjusted_rate":         0.0,
+}
+
 
 def get_mc_band_label(mc: float) -> str:
     if mc < 1_000_000:
@@ -19,18 +33,41 @@ def get_mc_band_label(mc: float) -> str:
         return "$5M〜$50M"
 
 
-def calculate_score(df: pd.DataFrame, pair_info: dict) -> dict:
+def _mc_display_values(
+    mc: float, entry: float, stop_loss: float, take_profit: float, vwap: float, atr: float,
+) -> dict:
+    """現在価格からサプライを逆算し、SL/TP/VWAP/ATR を MC 換算した値を返す（通知表示用）。"""
+    if entry > 0:
+        supply  = mc / entry
+        atr_pct = atr / entry * 100
+    else:
+        supply  = 0
+        atr_pct = 0
+    return {
+        "supply":  supply,
+        "sl_mc":   stop_loss   * supply,
+        "tp_mc":   take_profit * supply,
+        "vwap_mc": vwap        * supply,
+        "atr_mc":  atr         * supply,
+        "atr_pct": atr_pct,
+    }
+
+
+def calculate_score(df: pd.DataFrame, pair_info: dict, notify_threshold: int | None = None) -> dict:
     """
     スコアを計算して結果辞書を返す。
 
     Args:
-        df        : OHLCVのDataFrame
-        pair_info : dex_scanner.py が返す正規化済み辞書（mc フィールドを含む）
+        df               : OHLCVのDataFrame
+        pair_info        : dex_scanner.py が返す正規化済み辞書（mc フィールドを含む）
+        notify_threshold : 指定した場合、スコアがこの値未満なら通知表示用の MC 換算値を省略する。
+                           SKIP_REPRO_BELOW_THRESHOLD が True なら、届かないことが確定した時点で再現性の計算も省略する
 
     Returns:
         score, breakdown, mc_band, rsi, atr, vwap, vol_surge,
         entry, stop_loss, take_profit, risk_reward,
         atr_sl_mult, atr_tp_mult,
+        supply, sl_mc, tp_mc, vwap_mc, atr_mc, atr_pct（通知対象のときのみ）,
         signal_count, success_count, success_rate, low_sample
     """
     mc        = pair_info["mc"]
@@ -38,14 +75,17 @@ def calculate_score(df: pd.DataFrame, pair_info: dict) -> dict:
     mc_params = config.get_mc_params(mc)
 
     # ── インジケーター計算 ──────────────────────────────────────
-    rsi       = calc_rsi(df["close"])
-    atr       = calc_atr(df)
-    vwap      = calc_vwap(df)
-    vol_surge = calc_volume_surge(df)
-    close     = float(df["close"].iloc[-1])
+    # OHLCV の列は1回だけ配列に変換し、指標・再現性・価格位置の計算で共有する
+    candles   = Candles.from_df(df)
+    ind       = compute_all(candles)
+    rsi       = ind["rsi"]
+    atr       = ind["atr"]
+    vwap      = ind["vwap"]
+    vol_surge = ind["vol_surge"]
+    close     = ind["close"]
 
     # ── 出来高急増スコア（30点） ──────────────────────────────
-    surge_min  = mc_params["volume_surge_min"]
+    surge_min  = mc_params.volume_surge_min
     surge_half = surge_min * 0.7
 
     if vol_surge >= surge_min:
@@ -59,7 +99,7 @@ def calculate_score(df: pd.DataFrame, pair_info: dict) -> dict:
     vwap_score = 20.0 if close > vwap else 0.0
 
     # ── RSI(9)スコア（15点）＋ 過熱ペナルティ（−15点） ────────
-    rsi_ob = mc_params["rsi_overbought"]
+    rsi_ob = mc_params.rsi_overbought
 
     if 50 < rsi <= rsi_ob:
         rsi_score = 15.0
@@ -74,22 +114,39 @@ def calculate_score(df: pd.DataFrame, pair_info: dict) -> dict:
         rsi_score = 0.0
         penalty   = 0.0
 
+    # ── 価格位置スコア（PPS）加減点（+10〜-10点） ────────────────
+    pps_result = calc_price_position(candles, vwap, rsi)
+    pps_bonus  = pps_result["pps_bonus"]
+
     # ── 再現性スコア（25点） ─────────────────────────────────
-    repro      = calc_reproducibility(df, mc)
+    # 再現性が満点でも通知閾値に届かない場合は、最も重い再現性の計算を省略する
+    upper_bound = vol_score + vwap_score + rsi_score + penalty + pps_bonus + _REPRO_MAX_SCORE
+    if (
+        config.SKIP_REPRO_BELOW_THRESHOLD
+        and notify_threshold is not None
+        and round(upper_bound) < notify_threshold
+    ):
+        repro = _REPRO_SKIPPED
+    else:
+        # RSI / ATR は compute_all で全足分を計算済みのため、再計算させずに渡す
+        series = {"rsi_series": ind["rsi_series"], "atr_series": ind["atr_series"]}
+        pool_address = pair_info.get("pair_address")
+        if pool_address and "timestamp" in df.columns:
+            # 同じプール・同じ最新足なら前回スキャンの結果を使い回す
+            last_ts = df["timestamp"].to_numpy()[-1]
+            repro   = calc_reproducibility_cached(pool_address, last_ts, candles, mc, **series)
+        else:
+            repro   = calc_reproducibility(candles, mc, **series)
     repro_score = repro["reproducibility_score"]
     low_sample  = repro["signal_count"] < 5
 
-    # ── 価格位置スコア（PPS）加減点（+10〜-10点） ────────────────
-    pps_result = calc_price_position(df, vwap, rsi)
-    pps_bonus  = pps_result["pps_bonus"]
-
     # ── 合計スコア ────────────────────────────────────────────
     total = vol_score + vwap_score + rsi_score + repro_score + penalty + pps_bonus
     score = max(0, min(100, round(total)))
 
     # ── 損切り・利確 ──────────────────────────────────────────
-    atr_sl_mult = mc_params["atr_sl_mult"]
-    atr_tp_mult = mc_params["atr_tp_mult"]
+    atr_sl_mult = mc_params.atr_sl_mult
+    atr_tp_mult = mc_params.atr_tp_mult
 
     entry       = close
     stop_loss   = entry - atr * atr_sl_mult
@@ -98,7 +155,7 @@ def calculate_score(df: pd.DataFrame, pair_info: dict) -> dict:
     sl_dist     = entry - stop_loss
     risk_reward = (take_profit - entry) / sl_dist if sl_dist > 0 else 0.0
 
-    return {
+    result = {
         "score":         score,
         "breakdown": {
             "vol_score":   vol_score,
@@ -132,10 +189,13 @@ def calculate_score(df: pd.DataFrame, pair_info: dict) -> dict:
         "adjusted_rate": repro.get("adjusted_rate", repro["success_rate"]),
         "low_sample":    low_sample,
     }
+    # MC 換算値は通知メッセージでしか使わないため、通知しないペアでは計算しない
+    if notify_threshold is None or score >= notify_threshold:
+        result.update(_mc_display_values(mc, entry, stop_loss, take_profit, vwap, atr))
+    return result
 
 
 if __name__ == "__main__":
-    import time
     import dex_scanner
     import gt_fetcher
 
@@ -153,7 +213,6 @@ if __name__ == "__main__":
 
         pool_addr = gt_fetcher.get_pool_address(pair["token_address"])
         if pool_addr:
-            time.sleep(config.GT_REQUEST_INTERVAL)
             df = gt_fetcher.fetch_ohlcv(pool_addr, pair["mc"])
             if df is not None and len(df) >= config.MIN_CANDLES:
                 result = calculate_score(df, pair)
@@ -12,16 +12,37 @@ tracker.py
 """
 from __future__ import annotations
 
+import csv
+import heapq
 import logging
+import mmap
 import os
+import random
+import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
+from email.utils import parsedate_to_datetime
 
+import numpy as np
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 
 import config
+import gt_fetcher
+
+try:
+    from numba import njit
+except ImportError:  # numba が無い環境では同じ関数を Python のまま実行する
+    njit = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # pyarrow が無い環境では pandas の CSV リーダーを使う
+    pa = pacsv = None
 
 logger = logging.getLogger(__name__)
 JST = timezone(timedelta(hours=9))
@@ -35,7 +56,20 @@ OUTCOME_CHECK_DELAY = 3600
 
 # GeckoTerminal API リトライ設定
 _MAX_RETRIES = 3
-_RETRY_WAIT  = 10.0  # 429時のリトライ待機秒数
+_RETRY_WAIT  = 10.0  # 429時のリトライ待機の基準秒数（Retry-After が無ければ 10 → 20 → 40 秒 + ジッター）
+
+# check_outcomes で OHLCV を並行取得するスレッド数
+# レートゲートの枠は各スレッドが1つずつ先に予約するため、多いほど同時に走るスキャンのリクエストが後ろに回される。
+# 開始間隔（GT_REQUEST_INTERVAL）が応答時間より長いので、2本あればゲートの枠は埋まる
+_OUTCOME_WORKERS = min(2, config.GT_MAX_CONCURRENCY)
+
+# 結果確認用の HTTP セッション（接続を使い回して TLS ハンドシェイクを省く）
+# 429 は _fetch_outcome が待機時間を決めてリトライするため、gt_fetcher.SESSION と違いアダプタの自動リトライは付けない
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_maxsize=_OUTCOME_WORKERS))
+
+# 結果として記録する価格の時点（シグナルからの秒数: 15分・30分・60分後）
+_PRICE_OFFSETS = np.array([900, 1800, 3600], dtype=np.int64)
 
 # これより古いシグナルでも取得できなければ UNKNOWN に確定する（2時間）
 OUTCOME_UNKNOWN_AFTER = 2 * 3600  # 2時間
@@ -115,6 +149,54 @@ COLUMNS = [
     "pnl_pct",             # 60分後の損益率（%）
 ]
 
+# pyarrow で読むときの列の型（型推論を省く。ここに無い列は pyarrow が推論する）
+# 空欄は欠損として読む。整数列に欠損がある場合は pandas と同じく float になる
+_INT_COLUMNS = [
+    "signal_time_unix", "mc", "liquidity", "score_total", "score_liquidity",
+    "pps", "signal_count", "success_count", "ohlcv_aggregate", "notify_threshold",
+]
+_FLOAT_COLUMNS = [
+    "entry_price", "sl_price", "tp_price", "rr_ratio", "atr", "vwap", "rsi", "vol_surge",
+    "score_volume", "score_vwap", "score_rsi", "score_repro", "score_penalty", "score_pps_bonus",
+    "range_pct", "vwap_dev", "success_rate", "adjusted_rate",
+    "price_15m", "price_30m", "price_60m", "high_60m", "low_60m", "pnl_pct",
+]
+_STRING_COLUMNS = [
+    "signal_id", "signal_time_jst", "symbol", "mc_band", "pps_label",
+    "notified", "gecko_url", "pool_address", "token_address",
+    "outcome_checked_at", "outcome",
+]
+# sl_hit / tp_hit は True/False を代入するため、型は pyarrow の推論（bool / 空欄のみなら欠損）に任せる
+# rsi_overbought / atr_sl_mult / atr_tp_mult / volume_surge_min は設定値をそのまま書くため整数にも小数にもなる。
+# 型を決めると書き直しのたびに 75 → 75.0 のように CSV の表記が変わるので、これも推論に任せる
+
+# _init_csv がこのプロセスで CSV の存在を確認済みか（_INIT_LOCK で初回の確認を1回にする）
+_CSV_READY = False
+_INIT_LOCK = threading.Lock()
+
+# CSV への書き込み（追記・全体書き直し）を直列化するロック
+# check_outcomes は読み込み・反映・書き込みの間これを持ち続ける（中で _read_csv / _write_csv も取るため RLock）
+_FILE_LOCK = threading.RLock()
+
+# OPEN 状態のトークンアドレス → そのシグナル時刻[Unix秒]（_open_tokens() で初回に CSV から作る）
+_OPEN_TOKENS: dict[str, int | None] | None = None
+
+# OPEN トークンの (シグナル時刻, トークン) の最小ヒープ（has_old_open_signals 用）
+# 結果が確定したトークンは取り除かず、先頭を見るときに _OPEN_TOKENS と食い違うものを捨てる
+_OPEN_HEAP: list[tuple[int, str]] = []
+
+# _read_csv の結果キャッシュ（ファイルの更新時刻とサイズが変わらない限り再パースしない）
+# pending: 追記済みでまだ df に足していない行（次に読むときに1回の concat でまとめて足す）
+_DF_CACHE: dict = {"key": None, "df": None, "pending": []}
+
+# get_summary で集計する outcome の区分（W: 勝ち / L: 負け / R: 判定不能のまま確定 / O: 未確認）
+_OUTCOME_BUCKETS = {
+    "WIN": "W", "WIN+": "W",
+    "LOSS": "L", "LOSS-": "L",
+    "BOTH": "R", "UNKNOWN": "R",
+    "OPEN": "O",
+}
+
 # outcome の意味
 # WIN     : TP に先着（最も良い結果）
 # LOSS    : SL に先着（損切り発動）
@@ -131,28 +213,279 @@ COLUMNS = [
 # ══════════════════════════════════════════════════════════════
 
 def _init_csv():
-    """CSV が存在しない場合はヘッダー付きで新規作成する。logs/ フォルダも自動作成する。"""
-    os.makedirs(LOG_DIR, exist_ok=True)
-    if not os.path.exists(LOG_FILE):
-        pd.DataFrame(columns=COLUMNS).to_csv(LOG_FILE, index=False, encoding="utf-8-sig")
-        logger.info(f"[tracker] ログファイル新規作成: {LOG_FILE}")
+    """
+    CSV が存在しない場合はヘッダー付きで新規作成する。logs/ フォルダも自動作成する。
+    確認はプロセス内で1回だけ行う（rotate_log がファイルを置き換えたときはやり直す）。
+    """
+    global _CSV_READY
+    if _CSV_READY:
+        return
+    with _INIT_LOCK:
+        if _CSV_READY:
+            return
+        os.makedirs(LOG_DIR, exist_ok=True)
+        if not os.path.exists(LOG_FILE):
+            pd.DataFrame(columns=COLUMNS).to_csv(LOG_FILE, index=False, encoding="utf-8-sig")
+            logger.info(f"[tracker] ログファイル新規作成: {LOG_FILE}")
+        _CSV_READY = True
 
 
 def _read_csv() -> pd.DataFrame:
-    """CSV を読み込む。失敗した場合は空の DataFrame を返す。"""
+    """
+    CSV を読み込む。失敗した場合は空の DataFrame を返す。
+    ファイルの (mtime_ns, size) が前回と同じならパースせずキャッシュを返す。
+    返り値はキャッシュと共有しているため、変更する呼び出し側は .copy() してから使う。
+    """
     try:
-        return pd.read_csv(LOG_FILE, encoding="utf-8-sig", dtype={"signal_time_unix": "Int64"})
+        key = _file_key()
+        if _DF_CACHE["key"] == key:
+            if _DF_CACHE["pending"]:
+                with _FILE_LOCK:
+                    _merge_pending_rows()
+            return _DF_CACHE["df"]
+        df = _parse_csv()
     except Exception as e:
         logger.error(f"[tracker] ログ読み込み失敗: {e}")
         return pd.DataFrame(columns=COLUMNS)
+    _DF_CACHE["key"]     = key
+    _DF_CACHE["df"]      = df
+    _DF_CACHE["pending"] = []
+    return df
+
+
+def _file_key() -> tuple[int, int]:
+    """CSV の (mtime_ns, size)。_DF_CACHE の有効判定に使う。"""
+    st = os.stat(LOG_FILE)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _parse_csv() -> pd.DataFrame:
+    """CSV 全体をパースする。pyarrow があれば列の型を指定して読み、失敗したときだけ pandas で読み直す。"""
+    if pacsv is not None:
+        try:
+            column_types = {c: pa.int64() for c in _INT_COLUMNS}
+            column_types.update({c: pa.float64() for c in _FLOAT_COLUMNS})
+            column_types.update({c: pa.string() for c in _STRING_COLUMNS})
+            table = pacsv.read_csv(
+                LOG_FILE,
+                convert_options=pacsv.ConvertOptions(
+                    column_types=column_types,
+                    strings_can_be_null=True,
+                ),
+            )
+            df = table.to_pandas()
+            df["signal_time_unix"] = df["signal_time_unix"].astype("Int64")
+            return df
+        except Exception as e:
+            logger.debug(f"[tracker] pyarrow での読み込みに失敗したため pandas で読み直します: {e}")
+    return pd.read_csv(LOG_FILE, encoding="utf-8-sig", dtype={"signal_time_unix": "Int64"})
 
 
-def _write_csv(df: pd.DataFrame):
-    """DataFrame を CSV に書き込む。"""
+def _invalidate_df_cache():
+    """CSV を書き換えたときに呼ぶ（同じ時刻・サイズのまま内容が変わった場合にも古い内容を返さない）。"""
+    _DF_CACHE["key"]     = None
+    _DF_CACHE["df"]      = None
+    _DF_CACHE["pending"] = []
+
+
+def _extend_df_cache(prev_key: tuple[int, int], row: dict):
+    """
+    追記した1行をキャッシュに加える（次の _read_csv で全件を再パースしない）。
+    行は pending に溜めるだけにし、DataFrame への結合は次に読まれたときに1回で行う（追記ごとに全列をコピーしない）。
+    追記前のキャッシュがファイルと一致していなかった場合は破棄して、次回読み直す。_FILE_LOCK を持って呼ぶこと。
+    """
+    if _DF_CACHE["key"] != prev_key or _DF_CACHE["df"] is None:
+        _invalidate_df_cache()
+        return
+    # 空欄は CSV から読んだときと同じく欠損として持つ
+    _DF_CACHE["pending"].append({k: (None if v == "" else v) for k, v in row.items()})
+    _DF_CACHE["key"] = _file_key()
+
+
+def _merge_pending_rows():
+    """pending の行をキャッシュ済みの DataFrame にまとめて結合する。_FILE_LOCK を持って呼ぶこと。"""
+    pending = _DF_CACHE["pending"]
+    if pending and _DF_CACHE["df"] is not None:
+        _DF_CACHE["df"] = pd.concat([_DF_CACHE["df"], pd.DataFrame(pending)], ignore_index=True)
+    _DF_CACHE["pending"] = []
+
+
+def _write_csv(df: pd.DataFrame) -> bool:
+    """
+    DataFrame を CSV に書き込む。
+    書き込んだ df をそのまま _read_csv のキャッシュにする（直後の読み込みで全件を再パースしない）ため、
+    呼び出し側は渡した df を以後変更しないこと。
+    """
+    try:
+        with _FILE_LOCK:
+            _invalidate_df_cache()   # 書き込みに失敗した場合は次回読み直す
+            df.to_csv(LOG_FILE, index=False, encoding="utf-8-sig")
+            _DF_CACHE["key"] = _file_key()
+            _DF_CACHE["df"]  = df
+        return True
+    except Exception as e:
+        logger.error(f"[tracker] ログ書き込み失敗: {e}")
+        return False
+
+
+def _read_header() -> list[str]:
+    """CSV のヘッダー行（列名のリスト）を読む。"""
+    with open(LOG_FILE, newline="", encoding="utf-8-sig") as fh:
+        return next(csv.reader(fh), [])
+
+
+def _csv_field(value) -> str:
+    """1セル分の文字列。csv モジュールの QUOTE_MINIMAL と同じく、区切り・引用符・改行を含む場合だけ引用符で囲む。"""
+    if value is None:
+        return ""
+    s = str(value)
+    if "," in s or '"' in s or "\n" in s or "\r" in s:
+        return '"' + s.replace('"', '""') + '"'
+    return s
+
+
+def _format_row(row: dict, header: list[str]) -> str:
+    """
+    1行分の CSV テキストを組み立てる（改行コードは pandas の to_csv と同じ os.linesep）。
+    csv.DictWriter と同じ出力になるが、列名の照合や writer の生成を毎回行わない。
+    header にあって row に無い列は空欄にする。
+    """
+    return ",".join([_csv_field(row.get(c)) for c in header]) + os.linesep
+
+
+def _append_row(row: dict) -> bool:
+    """
+    1行を CSV の末尾に追記する（ファイル全体の読み直し・書き直しをしない）。書き込めた場合は True。
+    列構成が古いファイル（先頭が COLUMNS と一致しない）の場合だけ、
+    全件を読み込んで COLUMNS の順に並べ直して書き直す（COLUMNS に無い列は末尾に残す）。
+    """
     try:
-        df.to_csv(LOG_FILE, index=False, encoding="utf-8-sig")
+        with _FILE_LOCK:
+            header = _read_header()
+            if header[:len(COLUMNS)] != COLUMNS:
+                df    = pd.concat([_read_csv(), pd.DataFrame([row])], ignore_index=True)
+                extra = [c for c in df.columns if c not in COLUMNS]
+                return _write_csv(df.reindex(columns=COLUMNS + extra))
+            prev_key = _file_key()
+            # 追記モードではファイル先頭以外に BOM は書かれない
+            with open(LOG_FILE, "a", newline="", encoding="utf-8-sig") as fh:
+                fh.write(_format_row(row, header))
+            _extend_df_cache(prev_key, row)
+        return True
     except Exception as e:
         logger.error(f"[tracker] ログ書き込み失敗: {e}")
+        return False
+
+
+def _apply_updates(df: pd.DataFrame, updates: dict):
+    """
+    {行index: {列: 値}} を df に書き込む。
+    セルごとの df.at ではなく、列ごとに対象行をまとめて1回で代入する（行ごとに無い列は書き換えない）。
+    """
+    by_col: dict[str, dict] = {}
+    for idx, data in updates.items():
+        for col, val in data.items():
+            by_col.setdefault(col, {})[idx] = val
+    for col, vals in by_col.items():
+        df.loc[list(vals), col] = pd.Series(vals)
+
+
+def _scan_open_rows() -> list[tuple[str, int | None]] | None:
+    """
+    CSV を mmap し、",OPEN," を含む行だけを csv で解析して OPEN 行の (トークン, シグナル時刻) を返す（pandas でパースしない）。
+    必要な列が無い・outcome が最終列・行の列数がヘッダーと合わない（セル内改行など）場合は None を返す。
+    """
+    with open(LOG_FILE, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header_end = mm.find(b"\n")
+            if header_end == -1:
+                return []   # ヘッダーのみ
+            header = next(csv.reader([mm[:header_end + 1].decode("utf-8-sig")]), [])
+            if not {"outcome", "token_address", "signal_time_unix"} <= set(header):
+                return None
+            outcome_i = header.index("outcome")
+            token_i   = header.index("token_address")
+            ts_i      = header.index("signal_time_unix")
+            if outcome_i == len(header) - 1:
+                return None
+
+            rows = []
+            pos  = header_end + 1
+            while True:
+                hit = mm.find(b",OPEN,", pos)
+                if hit == -1:
+                    return rows
+                start = mm.rfind(b"\n", 0, hit) + 1
+                end   = mm.find(b"\n", hit)
+                end   = len(mm) if end == -1 else end + 1
+                cells = next(csv.reader([mm[start:end].decode("utf-8")]), [])
+                if len(cells) != len(header):
+                    return None
+                if cells[outcome_i] == "OPEN":
+                    try:
+                        ts = int(float(cells[ts_i]))
+                    except ValueError:
+                        ts = None
+                    rows.append((cells[token_i], ts))
+                pos = end
+
+
+def _open_tokens() -> dict[str, int | None]:
+    """
+    OPEN 状態のトークンアドレス → シグナル時刻[Unix秒]（プロセス内で保持）。
+    同じトークンに OPEN の行が複数ある場合は最も古い時刻を持つ。
+    初回だけ CSV から作り（OPEN 行だけを _scan_open_rows で拾い、拾えない形式なら全件パースする）、
+    以降は record_signal / check_outcomes / rotate_log が更新する。
+    """
+    global _OPEN_TOKENS, _OPEN_HEAP
+    if _OPEN_TOKENS is None:
+        _init_csv()
+        try:
+            open_rows = _scan_open_rows()
+        except Exception as e:
+            logger.debug(f"[tracker] OPEN 行の走査に失敗したため全件パースします: {e}")
+            open_rows = None
+        if open_rows is None:
+            df        = _read_csv()
+            open_rows = [] if df.empty else [
+                # 時刻が読めない行は経過時間の判定に使わない
+                (str(token), int(ts) if pd.notna(ts) else None)
+                for token, ts in df.loc[
+                    df["outcome"] == "OPEN", ["token_address", "signal_time_unix"]
+                ].itertuples(index=False)
+            ]
+        _OPEN_TOKENS = {}
+        for token, ts in open_rows:
+            prev = _OPEN_TOKENS.get(token)
+            if token not in _OPEN_TOKENS or (ts is not None and (prev is None or ts < prev)):
+                _OPEN_TOKENS[token] = ts
+        _OPEN_HEAP = [(ts, token) for token, ts in _OPEN_TOKENS.items() if ts is not None]
+        heapq.heapify(_OPEN_HEAP)
+    return _OPEN_TOKENS
+
+
+def _sync_open_tokens(df: pd.DataFrame):
+    """
+    df（CSV の現在の内容）に OPEN の行が無いトークンを OPEN 集合から外す。
+    外したトークンのヒープ項目は _oldest_open_time が読み飛ばす。_FILE_LOCK を持って呼ぶこと。
+    """
+    still_open  = set(df.loc[df["outcome"] == "OPEN", "token_address"].astype(str)) if not df.empty else set()
+    open_tokens = _open_tokens()
+    for token in [t for t in open_tokens if t not in still_open]:
+        del open_tokens[token]
+
+
+def _oldest_open_time() -> int | None:
+    """OPEN トークンのうち最も古いシグナル時刻[Unix秒]。無ければ None。"""
+    open_tokens = _open_tokens()
+    while _OPEN_HEAP:
+        ts, token = _OPEN_HEAP[0]
+        if open_tokens.get(token) == ts:
+            return ts
+        heapq.heappop(_OPEN_HEAP)   # 結果確定済み・記録し直されたトークンの古い項目
+    return None
 
 
 # ══════════════════════════════════════════════════════════════
@@ -175,35 +508,29 @@ def rotate_log() -> str | None:
         os.rename(LOG_FILE, archived)
         logger.info(f"[tracker] アーカイブ: {os.path.basename(archived)}")
     # 新しい signal_log.csv を初期化
+    global _CSV_READY, _OPEN_TOKENS, _OPEN_HEAP
+    _CSV_READY = False
     _init_csv()
+    _OPEN_TOKENS = {}
+    _OPEN_HEAP   = []
     logger.info("[tracker] 新しい signal_log.csv を作成しました")
     return archived
 
 
 def has_old_open_signals() -> bool:
-    """1時間以上経過した OPEN シグナルが存在するか確認する。"""
-    _init_csv()
-    df = _read_csv()
-    if df.empty:
-        return False
-    now_unix = int(time.time())
-    return bool(
-        (
-            (df["outcome"] == "OPEN") &
-            (now_unix - df["signal_time_unix"].astype("Int64") >= OUTCOME_CHECK_DELAY)
-        ).any()
-    )
+    """1時間以上経過した OPEN シグナルが存在するか確認する（CSV は読まず、OPEN 一覧の最古の時刻だけで判定する）。"""
+    oldest = _oldest_open_time()
+    return oldest is not None and int(time.time()) - oldest >= OUTCOME_CHECK_DELAY
 
 
 def is_token_open(token_address: str) -> bool:
     """指定トークンが OPEN 状態で記録されているか確認する。"""
-    _init_csv()
-    df = _read_csv()
-    if df.empty:
-        return False
-    return bool(
-        ((df["token_address"] == token_address) & (df["outcome"] == "OPEN")).any()
-    )
+    return token_address in _open_tokens()
+
+
+def open_tokens_set() -> set[str]:
+    """OPEN 状態で記録されているトークンアドレスの集合を返す（スキャン前の一括判定用）。"""
+    return set(_open_tokens())
 
 
 def record_signal(
@@ -228,19 +555,12 @@ def record_signal(
     Returns:
         signal_id（8文字の識別子）。スキップした場合は空文字列。
     """
-    _init_csv()
-
-    # OPEN 中の同トークンがあれば重複記録しない
-    df = _read_csv()
-    token = pair_info["token_address"]
-    if not df.empty:
-        already_open = (
-            (df["token_address"] == token) &
-            (df["outcome"] == "OPEN")
-        ).any()
-        if already_open:
-            logger.info(f"[tracker] スキップ（OPEN中）: {pair_info['symbol']}")
-            return ""
+    # OPEN 中の同トークンがあれば重複記録しない（CSV は読まず、メモリ上の集合で判定する）
+    open_tokens = _open_tokens()
+    token       = pair_info["token_address"]
+    if token in open_tokens:
+        logger.info(f"[tracker] スキップ（OPEN中）: {pair_info['symbol']}")
+        return ""
 
     mc_params = config.get_mc_params(pair_info["mc"])
     bd        = result["breakdown"]
@@ -279,11 +599,11 @@ def record_signal(
         "success_count":     result["success_count"],
         "success_rate":      round(result["success_rate"], 3),
         "adjusted_rate":     round(result.get("adjusted_rate", result["success_rate"]), 3),
-        "ohlcv_aggregate":   mc_params["ohlcv_aggregate"],
-        "rsi_overbought":    mc_params["rsi_overbought"],
-        "atr_sl_mult":       mc_params["atr_sl_mult"],
-        "atr_tp_mult":       mc_params["atr_tp_mult"],
-        "volume_surge_min":  mc_params["volume_surge_min"],
+        "ohlcv_aggregate":   mc_params.ohlcv_aggregate,
+        "rsi_overbought":    mc_params.rsi_overbought,
+        "atr_sl_mult":       mc_params.atr_sl_mult,
+        "atr_tp_mult":       mc_params.atr_tp_mult,
+        "volume_surge_min":  mc_params.volume_surge_min,
         "notified":          notified,
         "notify_threshold":  notify_threshold,
         "gecko_url":         pair_info["gecko_url"],
@@ -301,8 +621,10 @@ def record_signal(
         "outcome":            "OPEN",
         "pnl_pct":            "",
     }
-    df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
-    _write_csv(df)
+    if not _append_row(row):
+        return ""   # 行が残らなかったトークンは OPEN 扱いにしない
+    open_tokens[token] = row["signal_time_unix"]
+    heapq.heappush(_OPEN_HEAP, (row["signal_time_unix"], token))
 
     logger.info(
         f"[tracker] 記録: {pair_info['symbol']}  "
@@ -321,64 +643,88 @@ def check_outcomes() -> int:
         更新件数（int）
     """
     _init_csv()
-    df       = _read_csv()
+    df       = _read_csv()   # 対象を選ぶためだけに読む（書き換えは最後に読み直した内容に対して行う）
     now_unix = int(time.time())
-    updated  = 0
 
     # OPEN かつ 60分以上経過したシグナルを対象
+    # 時刻は _read_csv で整数列になっているため変換し直さず、欠損を NaN にした float64 配列で比べる（欠損の行は対象外）
+    signal_ts = df["signal_time_unix"].to_numpy(dtype=np.float64, na_value=np.nan)
     mask = (
-        (df["outcome"] == "OPEN") &
-        (now_unix - df["signal_time_unix"].astype("Int64") >= OUTCOME_CHECK_DELAY)
+        (df["outcome"] == "OPEN").to_numpy(dtype=bool) &
+        (now_unix - signal_ts >= OUTCOME_CHECK_DELAY)
     )
     pending = df[mask]
 
     if pending.empty:
+        # has_old_open_signals が True でも対象が無い場合は、OPEN 集合を CSV の内容に合わせ直して次回の空振りを防ぐ
+        with _FILE_LOCK:
+            _sync_open_tokens(_read_csv())
         return 0
 
     logger.info(f"[tracker] 結果確認対象: {len(pending)}件")
 
-    for idx, row in pending.iterrows():
-        age = now_unix - int(row["signal_time_unix"])
+    # 書き込む値は {signal_id: {列: 値}} に集め、最後に最新の CSV の該当行へまとめて反映する
+    # （取得中に record_signal が追記した行を消さないよう、行番号ではなく signal_id で対応付ける）
+    updates: dict = {}
 
-        # 10時間以上前のシグナルはデータ取得を諦める
+    # 10時間以上前のシグナルはデータ取得を諦め、それ以外は OHLCV をまとめて取得する
+    to_fetch = []
+    for _, row in pending.iterrows():
+        age = now_unix - int(row["signal_time_unix"])
         if age > OUTCOME_MAX_AGE:
-            df.at[idx, "outcome"]            = "EXPIRED"
-            df.at[idx, "outcome_checked_at"] = datetime.now(JST).strftime("%Y-%m-%d %H:%M:%S")
-            updated += 1
+            updates[row["signal_id"]] = {
+                "outcome":            "EXPIRED",
+                "outcome_checked_at": datetime.now(JST).strftime("%Y-%m-%d %H:%M:%S"),
+            }
             logger.info(f"[tracker] EXPIRED: {row.get('symbol')} ({age//3600}時間経過)")
-            continue
-
-        try:
-            outcome_data = _fetch_outcome(
-                pool_address = str(row["pool_address"]),
-                signal_unix  = int(row["signal_time_unix"]),
-                entry_price  = float(row["entry_price"]),
-                sl_price     = float(row["sl_price"]),
-                tp_price     = float(row["tp_price"]),
-            )
-            if outcome_data:
-                for col, val in outcome_data.items():
-                    df.at[idx, col] = val
-                updated += 1
-                logger.info(
-                    f"[tracker] 結果確認: {row.get('symbol')} "
-                    f"→ {outcome_data['outcome']}  pnl={outcome_data['pnl_pct']}%"
-                )
-            elif age >= OUTCOME_UNKNOWN_AFTER:
-                # 2時間以上経過してもデータが取れない場合は UNKNOWN に確定する
-                df.at[idx, "outcome"]            = "UNKNOWN"
-                df.at[idx, "outcome_checked_at"] = datetime.now(JST).strftime("%Y-%m-%d %H:%M:%S")
-                updated += 1
-                logger.info(f"[tracker] UNKNOWN（データ取得不可）: {row.get('symbol')} ({age//3600}時間{(age%3600)//60}分経過)")
-        except Exception as e:
-            logger.warning(f"[tracker] 結果確認失敗 ({row.get('symbol', '?')}): {e}")
-
-        time.sleep(config.GT_REQUEST_INTERVAL)
-
-    if updated > 0:
-        _write_csv(df)
-        logger.info(f"[tracker] {updated}件の結果を更新しました")
+        else:
+            to_fetch.append((row, age))
+
+    # 取得は最大 _OUTCOME_WORKERS 件を並行して行う。リクエストの開始間隔は
+    # gt_fetcher.wait_rate_limit() が全スレッド共通で守るため、API への負荷は変わらず応答待ちだけが重なる
+    with ThreadPoolExecutor(max_workers=_OUTCOME_WORKERS) as executor:
+        futures = [executor.submit(_fetch_outcome_for_row, row) for row, _ in to_fetch]
+
+        # 結果の反映は元の行順に1件ずつ行う
+        for (row, age), future in zip(to_fetch, futures):
+            try:
+                outcome_data = future.result()
+                if outcome_data:
+                    updates[row["signal_id"]] = outcome_data
+                    logger.info(
+                        f"[tracker] 結果確認: {row.get('symbol')} "
+                        f"→ {outcome_data['outcome']}  pnl={outcome_data['pnl_pct']}%"
+                    )
+                elif age >= OUTCOME_UNKNOWN_AFTER:
+                    # 2時間以上経過してもデータが取れない場合は UNKNOWN に確定する
+                    updates[row["signal_id"]] = {
+                        "outcome":            "UNKNOWN",
+                        "outcome_checked_at": datetime.now(JST).strftime("%Y-%m-%d %H:%M:%S"),
+                    }
+                    logger.info(f"[tracker] UNKNOWN（データ取得不可）: {row.get('symbol')} ({age//3600}時間{(age%3600)//60}分経過)")
+            except Exception as e:
+                logger.warning(f"[tracker] 結果確認失敗 ({row.get('symbol', '?')}): {e}")
+
+    if not updates:
+        return 0
 
+    # 読み直し・反映・書き込みの間は _FILE_LOCK を持ち、その間の追記と入れ違いにならないようにする
+    with _FILE_LOCK:
+        df = _read_csv().copy()   # 取得中に追記された行も含む最新の内容
+        by_index = {
+            idx: updates[sid]
+            for idx, sid, outcome in df[["signal_id", "outcome"]].itertuples()
+            if outcome == "OPEN" and sid in updates
+        }
+        updated = len(by_index)
+        if updated == 0:
+            return 0
+        _apply_updates(df, by_index)
+        if not _write_csv(df):
+            return 0
+        _sync_open_tokens(df)
+
+    logger.info(f"[tracker] {updated}件の結果を更新しました")
     return updated
 
 
@@ -392,56 +738,53 @@ def get_summary() -> dict:
     if df.empty:
         return {"total": 0}
 
-    WIN_OUTCOMES  = {"WIN", "WIN+"}
-    LOSS_OUTCOMES = {"LOSS", "LOSS-"}
+    # outcome を W(勝ち) / L(負け) / R(判定不能の確定) / O(OPEN) / X(その他) にまとめ、
+    # 通知有無との組ごとの件数・損益率の合計を1回の groupby で求める
+    agg = (
+        pd.DataFrame({
+            "bucket":   df["outcome"].map(_OUTCOME_BUCKETS).fillna("X"),
+            "notified": df["notified"].astype(str).str.lower() == "true",
+            "pnl":      pd.to_numeric(df["pnl_pct"], errors="coerce"),   # 空欄・数値以外は欠損
+        })
+        .groupby(["bucket", "notified"])["pnl"]
+        .agg(["size", "sum", "count"])
+    )
+    by_bucket    = agg.groupby(level="bucket").sum()
+    notified_agg = agg[agg.index.get_level_values("notified").to_numpy(dtype=bool)].droplevel("notified")
 
-    resolved = df[df["outcome"].isin(WIN_OUTCOMES | LOSS_OUTCOMES | {"BOTH", "UNKNOWN"})]
-    wins     = df[df["outcome"].isin(WIN_OUTCOMES)]
-    losses   = df[df["outcome"].isin(LOSS_OUTCOMES)]
-    notified = df[df["notified"].astype(str).str.lower() == "true"]
-    open_    = df[df["outcome"] == "OPEN"]
+    def n(table: pd.DataFrame, bucket: str) -> int:
+        return int(table["size"].get(bucket, 0))
 
-    total_resolved = len(resolved)
-    win_rate = round(len(wins) / total_resolved * 100, 1) if total_resolved > 0 else 0.0
+    def avg_pnl_of(table: pd.DataFrame) -> float:
+        count = int(table["count"].sum())
+        return round(float(table["sum"].sum()) / count, 2) if count > 0 else 0.0
 
-    # 平均損益率（pnl_pct が数値の行のみ）
-    pnl_series = (
-        df["pnl_pct"]
-        .replace("", pd.NA)
-        .dropna()
-        .astype(float)
-    )
-    avg_pnl = round(float(pnl_series.mean()), 2) if len(pnl_series) > 0 else 0.0
+    wins           = n(by_bucket, "W")
+    losses         = n(by_bucket, "L")
+    total_resolved = wins + losses + n(by_bucket, "R")
+    win_rate = round(wins / total_resolved * 100, 1) if total_resolved > 0 else 0.0
 
-    # 通知済みシグナルの勝率・平均損益率
-    notified_resolved = notified[notified["outcome"].isin(WIN_OUTCOMES | LOSS_OUTCOMES)]
-    notified_wins     = notified[notified["outcome"].isin(WIN_OUTCOMES)]
+    # 通知済みシグナルの勝率（BOTH / UNKNOWN は分母に含めない）・平均損益率
+    notified_wins     = n(notified_agg, "W")
+    notified_resolved = notified_wins + n(notified_agg, "L")
     notified_win_rate = (
-        round(len(notified_wins) / len(notified_resolved) * 100, 1)
-        if len(notified_resolved) > 0 else 0.0
-    )
-
-    notified_pnl_series = (
-        notified["pnl_pct"]
-        .replace("", pd.NA)
-        .dropna()
-        .astype(float)
+        round(notified_wins / notified_resolved * 100, 1)
+        if notified_resolved > 0 else 0.0
     )
-    notified_avg_pnl = round(float(notified_pnl_series.mean()), 2) if len(notified_pnl_series) > 0 else 0.0
 
     return {
         "total":               len(df),
-        "open":                len(open_),
+        "open":                n(by_bucket, "O"),
         "resolved":            total_resolved,
-        "wins":                len(wins),
-        "losses":              len(losses),
+        "wins":                wins,
+        "losses":              losses,
         "win_rate":            win_rate,
-        "notified":            len(notified),
-        "notified_resolved":   len(notified_resolved),
+        "notified":            int(notified_agg["size"].sum()),
+        "notified_resolved":   notified_resolved,
         "notified_win_rate":   notified_win_rate,
-        "notified_avg_pnl":    notified_avg_pnl,
+        "notified_avg_pnl":    avg_pnl_of(notified_agg),
         "avg_score":           round(float(df["score_total"].mean()), 1) if len(df) > 0 else 0.0,
-        "avg_pnl":             avg_pnl,
+        "avg_pnl":             avg_pnl_of(agg),
         "log_file":            LOG_FILE,
     }
 
@@ -450,6 +793,65 @@ def get_summary() -> dict:
 #  内部: GeckoTerminal から結果を取得
 # ══════════════════════════════════════════════════════════════
 
+def _retry_wait(resp: requests.Response, attempt: int) -> float:
+    """
+    429 のときにリトライまで待つ秒数。
+    Retry-After ヘッダ（秒数 or 日時）があればそれに従い、無ければ _RETRY_WAIT × 2^attempt の指数バックオフ。
+    複数スレッドが同時に再送しないよう、0〜_RETRY_WAIT/2 秒のジッターを加える。
+    """
+    wait        = _RETRY_WAIT * (2 ** attempt)
+    retry_after = resp.headers.get("Retry-After")
+    if retry_after:
+        try:
+            wait = float(retry_after)
+        except ValueError:
+            try:
+                wait = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            except (TypeError, ValueError):
+                pass
+    return max(wait, 0.0) + random.uniform(0, _RETRY_WAIT / 2)
+
+
+def _scan_sl_tp(
+    highs: np.ndarray, lows: np.ndarray, sl_price: float, tp_price: float,
+) -> tuple[int, bool, bool]:
+    """
+    ウィンドウ内の足を時系列順に1回だけ走査し、(最初に到達した側, SL到達, TP到達) を返す。
+    最初に到達した側は 0: どちらも未到達 / 1: SL / 2: TP / 3: 同一ローソク足で両方（_FIRST_HIT_LABELS で結果名にする）。
+    スカラーのループのみで書いているため、numba があれば機械語にコンパイルされる。
+    """
+    first  = 0
+    sl_hit = False
+    tp_hit = False
+    for k in range(len(highs)):
+        hit_sl = lows[k]  <= sl_price
+        hit_tp = highs[k] >= tp_price
+        if first == 0:
+            first = int(hit_sl) + 2 * int(hit_tp)
+        sl_hit = sl_hit or hit_sl
+        tp_hit = tp_hit or hit_tp
+    return first, sl_hit, tp_hit
+
+
+if njit is not None:
+    # fastmath は NaN を含まない前提の最適化を行うため使わない（NaN の足は「到達していない」と判定する必要がある）
+    _scan_sl_tp = njit(cache=True)(_scan_sl_tp)
+
+# _scan_sl_tp が返す「最初に到達した側」→ outcome の判定に使う名前
+_FIRST_HIT_LABELS = (None, "LOSS", "WIN", "BOTH")
+
+
+def _fetch_outcome_for_row(row: pd.Series) -> dict | None:
+    """ログの1行から _fetch_outcome を呼ぶ（値の変換エラーもワーカー内で発生させ、行ごとに扱えるようにする）。"""
+    return _fetch_outcome(
+        pool_address = str(row["pool_address"]),
+        signal_unix  = int(row["signal_time_unix"]),
+        entry_price  = float(row["entry_price"]),
+        sl_price     = float(row["sl_price"]),
+        tp_price     = float(row["tp_price"]),
+    )
+
+
 def _fetch_outcome(
     pool_address: str,
     signal_unix:  int,
@@ -482,12 +884,13 @@ def _fetch_outcome(
     resp = None
     for attempt in range(_MAX_RETRIES + 1):
         try:
-            resp = requests.get(url, headers=config.GT_HEADERS, params=params, timeout=10)
+            gt_fetcher.wait_rate_limit()
+            resp = _SESSION.get(url, headers=config.GT_HEADERS, params=params, timeout=10)
             resp.raise_for_status()
             break
         except requests.exceptions.HTTPError as e:
             if resp is not None and resp.status_code == 429 and attempt < _MAX_RETRIES:
-                wait = _RETRY_WAIT * (attempt + 1)
+                wait = _retry_wait(resp, attempt)
                 logger.warning(
                     f"[tracker] OHLCV 429 レート制限 ({pool_address}) "
                     f"→ {wait:.0f}秒後にリトライ ({attempt + 1}/{_MAX_RETRIES})"
@@ -503,69 +906,46 @@ def _fetch_outcome(
         return None
 
     try:
-        raw = resp.json()["data"]["attributes"]["ohlcv_list"]
+        raw = gt_fetcher.load_json(resp)["data"]["attributes"]["ohlcv_list"]
         raw.reverse()  # 降順 → 昇順
 
-        df = pd.DataFrame(
-            raw, columns=["timestamp", "open", "high", "low", "close", "volume"]
-        )
-        df = df.astype({
-            "timestamp": int, "open": float, "high": float,
-            "low": float, "close": float, "volume": float,
-        })
+        # [timestamp, open, high, low, close, volume] の行を float64 の2次元配列として直接読む
+        arr = np.asarray(raw, dtype=np.float64).reshape(-1, 6)
+
+        # タイムスタンプ昇順に並べた配列で判定する（API の並び順に依存しない）
+        arr    = arr[np.argsort(arr[:, 0], kind="stable")]
+        ts     = arr[:, 0].astype(np.int64)
+        closes = arr[:, 4]
 
         # シグナル後 60分のウィンドウ
         # 5分足のタイムスタンプは300秒境界なので、シグナル時刻を含む足の開始時刻から始める
         candle_sec    = 300
         signal_candle = (signal_unix // candle_sec) * candle_sec
-        window = df[
-            (df["timestamp"] >= signal_candle) &
-            (df["timestamp"] <= signal_unix + 3600)
-        ].copy()
+        start = np.searchsorted(ts, signal_candle, side="left")
+        end   = np.searchsorted(ts, signal_unix + 3600, side="right")
 
-        if window.empty:
+        if start >= end:
             logger.warning(
                 f"[tracker] シグナル後ウィンドウにデータなし "
                 f"(pool={pool_address}, signal={signal_unix}, candle_start={signal_candle})"
             )
             return None
 
-        # 各時点の価格（その時点以前の最新終値）
-        def price_at(target_unix: int) -> float | None:
-            cands = df[df["timestamp"] <= target_unix]
-            return float(cands["close"].iloc[-1]) if not cands.empty else None
+        highs = arr[start:end, 2]
+        lows  = arr[start:end, 3]
 
-        p15 = price_at(signal_unix + 900)
-        p30 = price_at(signal_unix + 1800)
-        p60 = price_at(signal_unix + 3600)
+        # 15・30・60分後の価格（その時点以前の最新終値）。3時点の位置を1回の searchsorted で求める
+        at = np.searchsorted(ts, signal_unix + _PRICE_OFFSETS, side="right")
+        p15, p30, p60 = (float(closes[i - 1]) if i > 0 else None for i in at)
 
-        high_60 = float(window["high"].max())
-        low_60  = float(window["low"].min())
+        high_60 = float(highs.max())
+        low_60  = float(lows.min())
 
         # SL・TP 到達判定（どちらが先かを時系列で確認）
-        sl_hit    = False
-        tp_hit    = False
-        first_hit = None
-
-        for _, candle in window.sort_values("timestamp").iterrows():
-            hit_sl = candle["low"]  <= sl_price
-            hit_tp = candle["high"] >= tp_price
-
-            if first_hit is None:
-                if hit_sl and hit_tp:
-                    # 同一ローソク足で両到達 → 先着不明
-                    sl_hit = tp_hit = True
-                    first_hit = "BOTH"
-                elif hit_sl:
-                    sl_hit    = True
-                    first_hit = "LOSS"
-                elif hit_tp:
-                    tp_hit    = True
-                    first_hit = "WIN"
-            else:
-                # 先着確定後も到達有無だけ記録
-                if hit_sl: sl_hit = True
-                if hit_tp: tp_hit = True
+        first_code, sl_hit, tp_hit = _scan_sl_tp(highs, lows, sl_price, tp_price)
+        first_hit = _FIRST_HIT_LABELS[first_code]
+        sl_hit    = bool(sl_hit)
+        tp_hit    = bool(tp_hit)
 
         # 結果分類
         if first_hit == "WIN":